@@ -11,7 +11,7 @@ from .utils import settings, log
 from .models import Model
 from .capabilities import Capability
 from .tests import Test, TestM2M
-from .suites import TestSuite
+from .suites import TestSuite, TestFamily
 from .scores import Score
 from .errors import Error
 from .scores.collections import ScoreArray, ScoreMatrix, ScorePanel
@@ -51,6 +51,110 @@ class Capability(SciUnit):
         return self.name
 
 
+class CapabilityIndex(object):
+    """An inverted index from capabilities to the models that have them.
+
+    Checking every capability of every test against every model repeats the
+    same work many times over: class-level capability (`isinstance`) checks
+    depend only on the model's class, and each model's
+    `extra_capability_checks` only need to be run once per capability.
+    This index caches both, and builds (lazily) a set of capable models for
+    each capability, so that the models eligible for a test are the
+    intersection of the sets for its required capabilities.
+
+    Models are identified by their position in `models`, so they need not
+    be hashable.
+    """
+
+    def __init__(self, models, require_extra=False):
+        self.models = list(models)
+        self.require_extra = require_extra
+        self._class_capable = {}  # (model class, capability) -> bool
+        self._capable = {}  # capability -> frozenset of model indices
+        self._eligible = {}  # required capabilities -> frozenset
+
+    models = None
+    """The models in the index."""
+
+    require_extra = False
+    """Whether capabilities also require an instance check to be present in
+    each model's `extra_capability_checks`."""
+
+    @classmethod
+    def covers(cls, test):
+        """Whether the index gives the same answers as
+        `test.check_capabilities`, i.e. whether neither the test's class nor
+        any of its required capabilities override the checks that the index
+        mirrors (`Test.check_capabilities`, `Test.check_capability` and
+        `Capability.check`)."""
+        from .tests import Test
+        for name in ('check_capabilities', 'check_capability'):
+            # Compare the functions; unbound methods are new objects on
+            # every lookup in Python 2.
+            method = getattr(test.__class__, name)
+            base = getattr(Test, name)
+            if name in test.__dict__ or \
+                    getattr(method, '__func__', method) is not \
+                    getattr(base, '__func__', base):
+                return False
+        base_check = Capability.check.__func__
+        return all(getattr(capability.check, '__func__', None) is base_check
+                   for capability in test.required_capabilities)
+
+    def class_capable(self, model_class, capability):
+        """Whether instances of `model_class` have `capability`, ignoring any
+        instance checks (cached)."""
+        key = (model_class, capability)
+        if key not in self._class_capable:
+            self._class_capable[key] = issubclass(model_class, capability)
+        return self._class_capable[key]
+
+    def instance_capable(self, model, capability):
+        """Whether `model` passes the instance check (if any) for
+        `capability`, following the same rules as `Capability.check`."""
+        f_name = model.extra_capability_checks.get(capability, None) \
+            if model.extra_capability_checks is not None \
+            else False
+        if f_name:
+            return bool(getattr(model, f_name)())
+        return not self.require_extra
+
+    def capable(self, capability):
+        """Return the (frozen) set of indices of models that have
+        `capability`."""
+        if capability not in self._capable:
+            self._capable[capability] = frozenset(
+                i for i, model in enumerate(self.models)
+                if self.class_capable(model.__class__, capability)
+                and self.instance_capable(model, capability))
+        return self._capable[capability]
+
+    def eligible(self, test):
+        """Return the (frozen) set of indices of models that have all of the
+        capabilities required by `test` (or a sequence of capabilities)."""
+        capabilities = getattr(test, 'required_capabilities', test)
+        key = tuple(capabilities)
+        if key not in self._eligible:
+            eligible = frozenset(range(len(self.models)))
+            for capability in key:
+                eligible = eligible & self.capable(capability)
+            self._eligible[key] = eligible
+        return self._eligible[key]
+
+    def eligible_models(self, test):
+        """Return the models that have all of the capabilities required by
+        `test`, in index order."""
+        return [self.models[i] for i in sorted(self.eligible(test))]
+
+    def missing(self, model_index, test):
+        """Return the first capability required by `test` that the model at
+        `model_index` lacks, or None."""
+        for capability in getattr(test, 'required_capabilities', test):
+            if model_index not in self.capable(capability):
+                return capability
+        return None
+
+
 class ProducesNumber(Capability):
     """An example capability for producing some generic number."""
 
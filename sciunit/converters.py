@@ -4,15 +4,25 @@ to the value required for particular score type.
 """
 
 from string import Template
-from .scores import BooleanScore
+
+import numpy as np
+
+from .scores import Score, BooleanScore, ScoreBlock
 
 
 class Converter(object):
     """
     Base converter class.
     Only derived classes should be used in applications.
+
+    Converters can be chained with `then`, and applied to whole arrays of
+    score values at once with `convert_many`.
     """
 
+    score_type = None
+    """The score type converted to, or None if it is the score type converted
+    from."""
+
     @property
     def description(self):
         if self.__doc__:
@@ -32,14 +42,78 @@ class Converter(object):
                                    "it not implemented." %
                                    self.__class__.__name__))
 
+    def _convert_many(self, values, score_type):
+        """
+        Takes an array of values of scores of `score_type` and returns an
+        array of the values of the converted scores.  By default `_convert`
+        is applied to a score made from each value; converters that can
+        work on the whole array at once override this.
+        """
+        return np.array([self._convert(score_type(value)).score
+                         for value in values])
+
+    def converted_type(self, score_type):
+        """The score type that scores of `score_type` are converted to."""
+        return self.score_type or score_type
+
+    def compile(self, score_type):
+        """
+        Returns a single function converting an array of values of scores of
+        `score_type` (see `_convert_many`), made once per score type.
+        """
+        compiled = self.__dict__.setdefault('_compiled', {})
+        if score_type not in compiled:
+            compiled[score_type] = self._compile(score_type)
+        return compiled[score_type]
+
+    def _compile(self, score_type):
+        return lambda values: self._convert_many(values, score_type)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_compiled', None)  # Remade when needed.
+        return state
+
+    def then(self, converter):
+        """Returns a converter applying this conversion and then another."""
+        return ComposedConversion(self, converter)
+
     def convert(self, score):
         new_score = self._convert(score)
         new_score.set_raw(score.get_raw())
-        for key,value in score.__dict__.items():
-            if key not in ['score','_raw']:
-                setattr(new_score,key,value)
+        if new_score is not score:
+            # Carry the rest of the metadata over by reference.
+            metadata = score.__dict__.copy()
+            metadata.pop('score', None)
+            metadata.pop('_raw', None)
+            new_score.__dict__.update(metadata)
         return new_score
 
+    def convert_many(self, values, score_type=None):
+        """
+        Converts many score values (e.g. a column of a score matrix) at once,
+        without making a score for each.
+
+        `values` is an array of the values of scores of `score_type` (by
+        default a generic `Score`), and an array of the converted values is
+        returned.  A `ScoreBlock` of scores can also be given, and a
+        `ScoreBlock` of the converted scores is returned.
+        """
+        if isinstance(values, ScoreBlock):
+            block = values
+            values = block.values[block.valid]
+            if block.units is not None:
+                values = values*block.units
+            converted = self.compile(block.score_type)(values)
+            converted, units = ScoreBlock.strip_units(converted)
+            result = np.zeros(block.values.shape, dtype=converted.dtype)
+            result[block.valid] = converted
+            return ScoreBlock(self.converted_type(block.score_type), result,
+                              valid=block.valid, units=units,
+                              missing=block.missing)
+        score_type = score_type or Score
+        return np.asanyarray(self.compile(score_type)(np.asanyarray(values)))
+
 
 class NoConversion(Converter):
     """
@@ -49,49 +123,122 @@ class NoConversion(Converter):
     def _convert(self, score):
         return score
 
+    def _convert_many(self, values, score_type):
+        return values
+
 
 class LambdaConversion(Converter):
     """
     Converts a score according to a lambda function.
     """
-    def __init__(self, f):
-        """f should be a lambda function"""
+    def __init__(self, f, f_many=None):
+        """f should be a lambda function of a score.  f_many, if given,
+        should do the same to an array of score values, for convert_many"""
         self.f = f
+        self.f_many = f_many
 
     def _convert(self, score):
         return score.__class__(self.f(score))
 
+    def _convert_many(self, values, score_type):
+        if self.f_many is None:
+            return super(LambdaConversion, self)._convert_many(values,
+                                                               score_type)
+        return self.f_many(values)
+
 
 class AtMostToBoolean(Converter):
     """
     Converts a score to pass if its value is at most $cutoff, otherwise False.
     """
+    score_type = BooleanScore
+
     def __init__(self, cutoff):
         self.cutoff = cutoff
 
     def _convert(self, score):
         return BooleanScore(bool(score <= self.cutoff))
 
+    def _convert_many(self, values, score_type):
+        return values <= self.cutoff
+
 
 class AtLeastToBoolean(Converter):
     """
     Converts a score to Pass if its value is at least $cutoff, otherwise False.
     """
+    score_type = BooleanScore
+
     def __init__(self, cutoff):
         self.cutoff = cutoff
 
     def _convert(self, score):
         return BooleanScore(score >= self.cutoff)
 
+    def _convert_many(self, values, score_type):
+        return values >= self.cutoff
+
 
 class RangeToBoolean(Converter):
     """
     Converts a score to Pass if its value is within the range
     [$low_cutoff,$high_cutoff], otherwise Fail.
     """
+    score_type = BooleanScore
+
     def __init__(self, low_cutoff, high_cutoff):
         self.low_cutoff = low_cutoff
         self.high_cutoff = high_cutoff
 
     def _convert(self, score):
         return BooleanScore(self.low_cutoff <= score <= self.high_cutoff)
+
+    def _convert_many(self, values, score_type):
+        return (self.low_cutoff <= values) & (values <= self.high_cutoff)
+
+
+class ComposedConversion(Converter):
+    """
+    Applies several conversions in turn.
+    """
+    def __init__(self, *converters):
+        self.converters = []
+        for converter in converters:
+            if isinstance(converter, ComposedConversion):
+                self.converters += converter.converters
+            else:
+                self.converters.append(converter)
+
+    @property
+    def description(self):
+        return ' Then: '.join([converter.description
+                               for converter in self.converters])
+
+    def converted_type(self, score_type):
+        for converter in self.converters:
+            score_type = converter.converted_type(score_type)
+        return score_type
+
+    def _compile(self, score_type):
+        # Chain the conversions' array functions into one function, so that
+        # no intermediate scores are made.
+        functions = []
+        for converter in self.converters:
+            functions.append(converter.compile(score_type))
+            score_type = converter.converted_type(score_type)
+
+        def convert_values(values):
+            for function in functions:
+                values = function(values)
+            return values
+        return convert_values
+
+    def _convert_many(self, values, score_type):
+        return self.compile(score_type)(values)
+
+    def _convert(self, score):
+        score_type = self.converted_type(score.__class__)
+        value = np.asanyarray(self.compile(score.__class__)(
+            np.atleast_1d(score.score)))[0]
+        return score_type(value.item() if isinstance(value, np.generic)
+                          else value)
@@ -18,6 +18,11 @@ class ParametersError(Error):
     pass
 
 
+class UnsupportedSchemaError(Error):
+    """Raised when a schema uses rules that a validator cannot handle."""
+    pass
+
+
 class CapabilityError(Error):
     """Error raised when a required capability is not
     provided by a model."""
@@ -40,13 +40,18 @@ class Model(SciUnit):
 
     @classmethod
     def get_capabilities(cls):
-        """List the model's capabilities."""
-        capabilities = []
-        for _cls in cls.mro():
-            if issubclass(_cls, Capability) and _cls is not Capability \
-              and not issubclass(_cls, Model):
-                capabilities.append(_cls)
-        return capabilities
+        """List the model's capabilities.
+
+        The list is computed from the class's MRO once per class and cached.
+        """
+        if '_capabilities' not in cls.__dict__:
+            capabilities = []
+            for _cls in cls.mro():
+                if issubclass(_cls, Capability) and _cls is not Capability \
+                  and not issubclass(_cls, Model):
+                    capabilities.append(_cls)
+            cls._capabilities = tuple(capabilities)
+        return list(cls._capabilities)
 
     @property
     def capabilities(self):
@@ -4,5 +4,7 @@ It also contains score collections such as arrays and matrices.
 """
 
 from .base import Score, ErrorScore
+from .block import ScoreBlock
 from .complete import *
 from .incomplete import *
+from .distributions import *
@@ -1,12 +1,32 @@
 """Base class for SciUnit scores."""
 
+import threading
+import multiprocessing
 from copy import copy
+try:
+    from types import MappingProxyType
+except ImportError:  # Python 2
+    MappingProxyType = dict
 
 import numpy as np
 
 from sciunit.base import SciUnit
-from sciunit.utils import log, config_get
-from sciunit.errors import InvalidScoreError
+from sciunit.utils import log, config, config_get
+from sciunit.errors import Error, InvalidScoreError
+
+_segment_pools = {}  # Number of threads -> shared thread pool
+_segment_pools_lock = threading.Lock()
+_in_segment = threading.local()
+
+
+def segment_pool(workers):
+    """The pool of `workers` threads shared by all calls to
+    `Score.map_segments` with that many workers, made when first needed."""
+    with _segment_pools_lock:
+        if workers not in _segment_pools:
+            from concurrent.futures import ThreadPoolExecutor
+            _segment_pools[workers] = ThreadPoolExecutor(max_workers=workers)
+        return _segment_pools[workers]
 
 
 class Score(SciUnit):
@@ -20,13 +40,15 @@ class Score(SciUnit):
             related_data (dict, optional): Artifacts to store with the score.
         """
         self.check_score(score)
-        if related_data is None:
-            related_data = {}
-        self.score, self.related_data = score, related_data
+        self.score = score
+        if related_data is not None:  # Otherwise made when first used.
+            self.related_data = related_data
         if isinstance(score, Exception):
             # Set to error score to use its summarize().
             self.__class__ = ErrorScore
-        super(Score, self).__init__()
+        # Scores are kept lean, with only the attributes that have been set
+        # in their __dict__, so SciUnit.__init__ is not called; each score's
+        # `unpicklable` list is made when it is first used.
 
     score = None
     """The score itself."""
@@ -52,15 +74,127 @@ class Score(SciUnit):
     determined in Test.compute_score before any transformation,
     e.g. by a Converter"""
 
-    related_data = None
-    """Data specific to the result of a test run on a model."""
-
     test = None
     """The test taken. Set automatically by Test.judge."""
 
     model = None
     """The model judged. Set automatically by Test.judge."""
 
+    prediction_summary = None
+    """A summary of the prediction (type, shape, dtype, units and hash).
+    Set by Test.judge if the test's score binding is 'summary'."""
+
+    ci = None
+    """A (low, high) confidence interval for the score from bootstrap
+    resamples of the observation and/or prediction samples.  Set by
+    Test.judge if it is asked to bootstrap."""
+
+    ci_level = None
+    """The confidence level of `ci`, e.g. 0.95."""
+
+    prediction_ref = None
+    """The key of the prediction in `prediction_store`, if it was stored
+    rather than bound to the score."""
+
+    prediction_store = None
+    """The store holding the prediction, if it was stored rather than bound
+    to the score."""
+
+    @property
+    def prediction(self):
+        """The prediction that was scored.
+
+        Bound directly to the score by Test.judge (score binding 'full'), or
+        retrieved from the prediction store on demand (score binding
+        'summary'); None if it was not kept.
+        """
+        if 'prediction' in self.__dict__:
+            return self.__dict__['prediction']
+        if self.prediction_store is not None and \
+           self.prediction_ref in self.prediction_store:
+            return self.prediction_store.get(self.prediction_ref)
+        return None
+
+    @prediction.setter
+    def prediction(self, prediction):
+        self.__dict__['prediction'] = prediction
+
+    @property
+    def unpicklable(self):
+        """A list of attributes that cannot or should not be pickled."""
+        if self.__dict__.get('_interned'):
+            return []  # Not kept, since the score is shared.
+        if 'unpicklable' not in self.__dict__:
+            self.__dict__['unpicklable'] = []
+        return self.__dict__['unpicklable']
+
+    @unpicklable.setter
+    def unpicklable(self, unpicklable):
+        self.__dict__['unpicklable'] = unpicklable
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in set(state.get('unpicklable', ())).intersection(state):
+            del state[key]
+        state.pop('_interned', None)  # Copies are not shared.
+        return state
+
+    def _state(self, state=None, keys=None, exclude=None):
+        if state is None:
+            state = self.__getstate__()
+            # The attributes that lean scores only set when first used.
+            state.setdefault('unpicklable', [])
+            if self.related_data_ref is None:
+                state.setdefault('related_data', {})
+        return super(Score, self)._state(state=state, keys=keys,
+                                         exclude=exclude)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Copies of a score also keep its stored data alive.
+        store = self.prediction_store
+        if store is not None:
+            for ref in (self.prediction_ref, self.related_data_ref):
+                if ref is not None and ref in store:
+                    store.acquire(ref, self)
+
+    related_data_ref = None
+    """The key of the related data in `prediction_store`, if they were
+    stored rather than bound to the score."""
+
+    @property
+    def related_data(self):
+        """Data specific to the result of a test run on a model."""
+        if 'related_data' in self.__dict__:
+            return self.__dict__['related_data']
+        if self.prediction_store is not None and \
+           self.related_data_ref in self.prediction_store:
+            return self.prediction_store.get(self.related_data_ref)
+        if self.__dict__.get('_interned'):
+            return MappingProxyType({})  # Read-only, since it is shared.
+        if self.related_data_ref is None:
+            self.__dict__['related_data'] = {}
+            return self.__dict__['related_data']
+        return None
+
+    @related_data.setter
+    def related_data(self, related_data):
+        self.__dict__['related_data'] = related_data
+
+    @property
+    def observation(self):
+        """The observation that the prediction was scored against.
+
+        Falls back to the test's observation if none was bound to the score.
+        """
+        if 'observation' in self.__dict__:
+            return self.__dict__['observation']
+        return getattr(self.test, 'observation', None)
+
+    @observation.setter
+    def observation(self, observation):
+        self.__dict__['observation'] = observation
+
     def check_score(self, score):
         if self._allowed_types and \
           not isinstance(score, self._allowed_types+(Exception,)):
@@ -80,6 +214,28 @@ class Score(SciUnit):
         where larger is better (used for sorting and coloring tables)."""
         return self.score
 
+    @classmethod
+    def norm_scores(cls, values):
+        """Vectorized `norm_score`: the normalized scores for an array of
+        score values of this type, as a float array.
+
+        Score types which override `norm_score` should override this too;
+        otherwise the `norm_score` of each score is used in its place (see
+        `norm_score_array`).
+        """
+        return np.asarray(values, dtype=float)
+
+    @classmethod
+    def has_vectorized_norm(cls):
+        """Whether `norm_scores` can stand in for this class's `norm_score`,
+        i.e. it is defined no higher up the class hierarchy."""
+        for klass in cls.__mro__:
+            if 'norm_scores' in klass.__dict__:
+                return True
+            if 'norm_score' in klass.__dict__:
+                return False
+        return False
+
     def color(self, value=None):
         """Turn the score intp an RGB color tuple of three 8-bit integers."""
         if value is None:
@@ -89,16 +245,51 @@ class Score(SciUnit):
 
     @classmethod
     def value_color(cls, value):
-        import matplotlib.cm as cm
-        if value is None or np.isnan(value):
-            rgb = (128, 128, 128)
-        else:
-            cmap_low = config_get('cmap_low', 38)
-            cmap_high = config_get('cmap_high', 218)
-            cmap_range = cmap_high - cmap_low
-            cmap = cm.RdYlGn(int(cmap_range*value+cmap_low))[:3]
-            rgb = tuple([x*256 for x in cmap])
-        return rgb
+        """Turn a norm score into an RGB color tuple (gray for None/NaN)."""
+        if value is None:
+            value = np.nan
+        return tuple(cls.value_colors([value])[0].tolist())
+
+    @classmethod
+    def value_colors(cls, values):
+        """Turn an array of norm scores into an array of RGB colors (with
+        one more dimension, of length 3).
+
+        Each norm score picks one of the 256 colors of the colormap (see
+        `color_table`), the range 0.0-1.0 covering the entries between the
+        'cmap_low' and 'cmap_high' config values; None and NaN are gray.
+        """
+        values = np.asarray(values, dtype=float)
+        cmap_low, cmap_high = cls.color_bounds()
+        missing = np.isnan(values)
+        index = np.where(missing, 0, (cmap_high-cmap_low)*values+cmap_low)
+        index = np.clip(index.astype(int), 0, 255)
+        colors = cls.color_table()[index]
+        colors[missing] = 128
+        return colors
+
+    _color_table = None
+    _color_bounds = None
+
+    @classmethod
+    def color_table(cls):
+        """The 256 RGB colors of the colormap used to color scores, as a
+        (256, 3) array of floats (made once)."""
+        if Score._color_table is None:
+            import matplotlib.cm as cm
+            Score._color_table = cm.RdYlGn(np.arange(256))[:, :3]*256
+        return Score._color_table
+
+    @classmethod
+    def color_bounds(cls):
+        """The colormap entries for norm scores of 0.0 and 1.0, from the
+        'cmap_low' and 'cmap_high' config values.  These are read once, and
+        again only if the configuration is reloaded."""
+        version = config.check()
+        if Score._color_bounds is None or Score._color_bounds[0] != version:
+            bounds = (config_get('cmap_low', 38), config_get('cmap_high', 218))
+            Score._color_bounds = (version, bounds)
+        return Score._color_bounds[1]
 
     @property
     def summary(self):
@@ -205,6 +396,162 @@ class Score(SciUnit):
     def score_type(self):
         return self.__class__.__name__
 
+    @classmethod
+    def compute_many(cls, observations, predictions):
+        """Compute one score for each of many observations of the same kind.
+
+        `observations` is a dictionary (or structured array) of equal-length
+        arrays, one for each observation key (e.g. 'mean' and 'std'), and
+        `predictions` is a single prediction shared by all of them. Returns
+        a sequence of scores.
+
+        Score types can override this with a vectorized implementation
+        (which also accepts arrays of predictions, broadcast against the
+        observations, and returns a `ScoreBlock`); by default `compute` is
+        called once per observation.
+        """
+        return [cls.compute(observation, predictions)
+                for observation in cls.iter_observations(observations)]
+
+    @classmethod
+    def bootstrap(cls, observation, prediction, n_resamples,
+                  random_state=None):
+        """Compute the score for each of `n_resamples` bootstrap resamples of
+        the samples of the observation and/or the prediction (see
+        `resample`).
+
+        Uses `compute_many` on all of the resamples at once if the score
+        type vectorizes it, and `compute` on each resample otherwise.
+        Returns the score values as a float array (NaN where a resample
+        could not be scored).
+        """
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        observations = cls.resample(observation, n_resamples, random_state)
+        predictions = cls.resample(prediction, n_resamples, random_state)
+        if observations is observation and predictions is prediction:
+            raise Error(("Neither the observation nor the prediction has "
+                         "samples to resample."))
+        if cls.compute_many.__func__ is not Score.compute_many.__func__:
+            scores = cls.compute_many(observations, predictions)
+            if hasattr(scores, 'raw'):  # A ScoreBlock.
+                return np.broadcast_to(scores.raw, (n_resamples,)).copy()
+        else:
+            scores = [cls.compute(cls._resampled(observations, observation,
+                                                 i),
+                                  cls._resampled(predictions, prediction, i))
+                      for i in range(n_resamples)]
+        values = np.full(n_resamples, np.nan)
+        for i, score in enumerate(scores):
+            value = getattr(score.score, 'magnitude', score.score)
+            try:
+                values[i] = float(value)
+            except (TypeError, ValueError):  # E.g. a NoneScore.
+                pass
+        return values
+
+    @classmethod
+    def resample(cls, data, n_resamples, random_state):
+        """Draw `n_resamples` bootstrap resamples of the samples in `data`:
+        a dictionary with a 'samples' array, or an array of samples itself.
+
+        The n samples are resampled with replacement all at once, with an
+        (n_resamples x n) array of indices.  Returns a dictionary of the
+        'mean', 'std' and 'n' of each resample (arrays of length
+        n_resamples), or `data` unchanged if it has no samples.
+        """
+        samples = data.get('samples') if isinstance(data, dict) else data
+        if samples is None or np.ndim(samples) != 1 or len(samples) < 2:
+            return data
+        n = len(samples)
+        indices = random_state.randint(0, n, size=(n_resamples, n))
+        resampled = samples[indices]
+        return {'mean': resampled.mean(axis=1),
+                'std': resampled.std(axis=1),
+                'n': np.full(n_resamples, n)}
+
+    @classmethod
+    def _resampled(cls, resamples, data, i):
+        """The i-th resample of `data`, as a dictionary (or `data` itself
+        if it was not resampled)."""
+        if resamples is data:
+            return data
+        resample = dict(data) if isinstance(data, dict) else {}
+        resample.update({key: value[i] for key, value in resamples.items()})
+        return resample
+
+    @classmethod
+    def reduce_stream(cls, chunks):
+        """Reduce a prediction given as a stream of chunks (an iterator of
+        arrays, e.g. from a generator) to a prediction that `compute` can
+        score.
+
+        By default the chunks are concatenated into one array.  Score types
+        that only need summary statistics of the prediction override this
+        to accumulate those as the chunks arrive instead (see
+        `sciunit.utils.RunningStats`), so that the whole prediction is never
+        in memory.
+        """
+        chunks = [np.atleast_1d(chunk) for chunk in chunks]
+        units = getattr(chunks[0], 'units', None) if chunks else None
+        if units is not None:
+            return np.concatenate([chunk.rescale(units).magnitude
+                                   for chunk in chunks])*units
+        return np.concatenate(chunks) if chunks else np.array([])
+
+    parallel_threshold = 2**22
+    """The number of elements above which the chunked kernels of a score
+    type (e.g. `ErrorMetricScore`'s) split their inputs across a pool of
+    threads, or None to never do so.  Smaller inputs are scored in the
+    calling thread, without the overhead of the pool."""
+
+    max_workers = None
+    """The number of threads that the chunked kernels use for large inputs
+    (by default, the number of CPUs)."""
+
+    @classmethod
+    def map_segments(cls, func, n, chunk_size=1):
+        """Return the concatenated lists returned by `func(start, stop)` on
+        contiguous segments covering `range(n)`.
+
+        If `n` reaches `parallel_threshold`, there is a segment for each of
+        `max_workers` threads, each a whole number of chunks of `chunk_size`
+        elements long, and they are processed in parallel (NumPy releases
+        the GIL in its kernels) on a shared pool (see `segment_pool`).
+        Otherwise, or if called from within a segment, `func(0, n)` is
+        returned.  Either way the results are in order, so that reducing
+        the partial results of each chunk gives the same answer.
+        """
+        workers = cls.max_workers or multiprocessing.cpu_count()
+        if cls.parallel_threshold is None or n < cls.parallel_threshold \
+           or workers < 2 or getattr(_in_segment, 'active', False):
+            return func(0, n)
+        n_chunks = -(-n // chunk_size)
+        step = -(-n_chunks // workers) * chunk_size
+
+        def run(start, stop):
+            # Nested calls run serially, rather than wait on the pool.
+            _in_segment.active = True
+            try:
+                return func(start, stop)
+            finally:
+                _in_segment.active = False
+
+        pool = segment_pool(workers)
+        futures = [pool.submit(run, start, min(start + step, n))
+                   for start in range(0, n, step)]
+        return [result for future in futures for result in future.result()]
+
+    @classmethod
+    def iter_observations(cls, observations):
+        """Iterate over a dictionary (or structured array) of observation
+        arrays, yielding one observation dictionary at a time."""
+        keys = list(observations.dtype.names) \
+            if isinstance(observations, np.ndarray) else list(observations)
+        n = len(observations[keys[0]]) if keys else 0
+        for i in range(n):
+            yield {key: observations[key][i] for key in keys}
+
     @classmethod
     def extract_means_or_values(cls, observation, prediction, key=None):
         """Extracts the mean, value, or user-provided key from the observation
@@ -215,6 +562,27 @@ class Score(SciUnit):
         pred_mv = cls.extract_mean_or_value(prediction, key)
         return obs_mv, pred_mv
 
+    @classmethod
+    def extract_many(cls, data, keys, required=True):
+        """Extracts the array for the first of `keys` in a dictionary or
+        structured array of arrays, for vectorized computation.
+
+        If `data` has no keys (e.g. it is an array of values) it is returned
+        as it is, unless `required`.
+        """
+        if isinstance(data, dict):
+            names = data
+        elif isinstance(data, np.ndarray) and data.dtype.names:
+            names = data.dtype.names
+        elif not required:
+            return data
+        else:
+            raise KeyError("%s has none of the keys %s" % (data, keys))
+        for key in keys:
+            if key in names:
+                return data[key]
+        raise KeyError("%s has none of the keys %s" % (data, keys))
+
     @classmethod
     def extract_mean_or_value(cls, obs_or_pred, key=None):
         """Extracts the mean, value, or user-provided key from an observation
@@ -243,6 +611,10 @@ class ErrorScore(Score):
     def norm_score(self):
         return 0.0
 
+    @classmethod
+    def norm_scores(cls, values):
+        return np.zeros(len(values))
+
     @property
     def summary(self):
         """Summarize the performance of a model on a test."""
@@ -254,3 +626,42 @@ class ErrorScore(Score):
 
     def __str__(self):
         return 'Error'
+
+
+def norm_score_value(score):
+    """The norm score of a score as a float (NaN if it has none)."""
+    try:
+        value = score.norm_score
+        return np.nan if value is None else float(value)
+    except Exception:
+        return np.nan
+
+
+def norm_score_array(scores):
+    """The norm scores of an array of scores, as a float array of the same
+    shape (NaN wherever there is no norm score).
+
+    The scores are grouped by type, and each group is normalized at once by
+    its type's `norm_scores`, rather than score by score.
+    """
+    cells = np.asarray(scores, dtype=object)
+    flat = cells.ravel()
+    norms = np.full(flat.shape, np.nan)
+    groups = {}
+    for i, score in enumerate(flat):
+        groups.setdefault(type(score), []).append(i)
+    for score_type, indices in groups.items():
+        if not issubclass(score_type, Score):
+            continue
+        values = None
+        if score_type.has_vectorized_norm():
+            try:
+                values = score_type.norm_scores(
+                    [getattr(flat[i].score, 'magnitude', flat[i].score)
+                     for i in indices])
+            except (TypeError, ValueError):  # E.g. a score of None.
+                values = None
+        if values is None:
+            values = [norm_score_value(flat[i]) for i in indices]
+        norms[indices] = values
+    return norms.reshape(cells.shape)
@@ -0,0 +1,91 @@
+"""A compact block of many scores of the same type."""
+
+try:
+    from collections.abc import Sequence
+except ImportError:  # Python 2
+    from collections import Sequence
+
+import numpy as np
+import quantities as pq
+
+from .incomplete import InsufficientDataScore
+
+
+class ScoreBlock(Sequence):
+    """Many scores of one score type, held as an array of their values.
+
+    Returned by the vectorized `compute_many` classmethods of score types.
+    Values that could not be computed (e.g. because an input was NaN) are
+    masked out, and appear as `InsufficientDataScore`s.  Indexing (or
+    iterating over) the block makes individual scores as they are needed,
+    so that a block of a million scores takes little more memory than its
+    arrays.
+    """
+
+    __slots__ = ('score_type', 'values', 'valid', 'units', 'missing')
+
+    def __init__(self, score_type, values, valid=None, units=None,
+                 missing="One of the input values was NaN"):
+        """
+        Args:
+            score_type (type): The Score subclass of the scores.
+            values (array): The score values.
+            valid (array of bool, optional): Which values are valid. By
+                default, those which are not NaN.
+            units (optional): Units of the score values, if any.
+            missing (str): The reason given by the InsufficientDataScores
+                for invalid values.
+        """
+        self.score_type = score_type
+        self.values = np.atleast_1d(np.asarray(values))
+        if valid is None:
+            valid = ~np.isnan(self.values) if self.values.dtype.kind == 'f' \
+                else np.ones(self.values.shape, dtype=bool)
+        self.valid = np.atleast_1d(np.asarray(valid, dtype=bool))
+        self.units = units
+        self.missing = missing
+
+    @property
+    def raw(self):
+        """The score values as floats, with NaN for invalid values."""
+        raw = self.values.astype(float)
+        raw[~self.valid] = np.nan
+        return raw
+
+    @property
+    def norm_scores(self):
+        """The normalized scores, with NaN for invalid values."""
+        norms = np.full(self.values.shape, np.nan)
+        norms[self.valid] = self.score_type.norm_scores(
+            self.values[self.valid])
+        return norms
+
+    def score(self, i):
+        """Make the score at index `i`."""
+        if not self.valid[i]:
+            return InsufficientDataScore(self.missing)
+        value = self.values[i].item()
+        if self.units is not None:
+            value = value * self.units
+        return self.score_type(value)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ScoreBlock(self.score_type, self.values[i],
+                              valid=self.valid[i], units=self.units,
+                              missing=self.missing)
+        return self.score(i)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return '<%s of %d %ss>' % (self.__class__.__name__, len(self),
+                                   self.score_type.__name__)
+
+    @classmethod
+    def strip_units(cls, values):
+        """Split `values` into a plain array and its units (or None)."""
+        if isinstance(values, pq.Quantity):
+            return values.magnitude, values.units
+        return np.asarray(values), None
@@ -16,6 +16,58 @@ from sciunit.base import SciUnit, TestWeighted
 from sciunit.models import Model
 from sciunit.tests import Test
 from sciunit.scores import Score, NoneScore
+from sciunit.scores.base import norm_score_array
+
+
+class TrackedIndexer(object):
+    """A pandas indexer (e.g. `.loc`) of a score matrix, through which
+    writes invalidate the values that the matrix has derived from its
+    cells."""
+
+    def __init__(self, indexer, matrix):
+        self._indexer = indexer
+        self._matrix = matrix
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        self._indexer[key] = value
+        self._matrix._invalidate()
+
+    def __call__(self, *args, **kwargs):
+        return TrackedIndexer(self._indexer(*args, **kwargs), self._matrix)
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+
+def _tracked_indexer(name):
+    def indexer(self):
+        return TrackedIndexer(getattr(super(WriteTracking, self), name), self)
+    indexer.__doc__ = "The pandas `%s` indexer, tracking writes." % name
+    return property(indexer)
+
+
+class WriteTracking(object):
+    """A mixin for score matrices (before pd.DataFrame in the bases) that
+    cache values derived from their cells.  Writes through item assignment
+    or the `loc`, `iloc`, `at` and `iat` indexers call `_invalidate`, so
+    that reads need not check whether the cells have changed.  (Writes
+    straight into the array given by `.values` are not tracked.)"""
+
+    def _invalidate(self):
+        """Drop the values derived from the cells."""
+        raise NotImplementedError()
+
+    def __setitem__(self, key, value):
+        super(WriteTracking, self).__setitem__(key, value)
+        self._invalidate()
+
+    loc = _tracked_indexer('loc')
+    iloc = _tracked_indexer('iloc')
+    at = _tracked_indexer('at')
+    iat = _tracked_indexer('iat')
 
 
 class ScoreArray(pd.Series, SciUnit,TestWeighted):
@@ -37,7 +89,7 @@ class ScoreArray(pd.Series, SciUnit,TestWeighted):
 
     def __init__(self, tests_or_models, scores=None, weights=None):
         if scores is None:
-            scores = [NoneScore for tom in tests_or_models]
+            scores = [NoneScore.interned() for tom in tests_or_models]
         tests_or_models = self.check_tests_and_models(tests_or_models)
         self.weights_ = [] if not weights else list(weights)
         super(ScoreArray, self).__init__(data=scores, index=tests_or_models)
@@ -79,7 +131,7 @@ class ScoreArray(pd.Series, SciUnit,TestWeighted):
     @property
     def norm_scores(self):
         """Return the `norm_score` for each test."""
-        return self.map(lambda x: x.norm_score)
+        return pd.Series(norm_score_array(self.values), index=self.index)
 
     def mean(self):
         """Compute a total score for each model over all the tests.
@@ -98,7 +150,7 @@ class ScoreArray(pd.Series, SciUnit,TestWeighted):
         return self.norm_scores.rank(ascending=False)[test_or_model]
 
 
-class ScoreMatrix(pd.DataFrame, SciUnit, TestWeighted):
+class ScoreMatrix(WriteTracking, pd.DataFrame, SciUnit, TestWeighted):
     """
     Represents a matrix of scores derived from a test suite.
     Extends the pandas DataFrame such that tests are columns and models
@@ -144,7 +196,8 @@ class ScoreMatrix(pd.DataFrame, SciUnit, TestWeighted):
         if isinstance(models, Model):
             models = [models]
         if scores is None:
-            scores = [[NoneScore for test in tests] for model in models]
+            scores = [[NoneScore.interned() for test in tests]
+                      for model in models]
         return tests, models, scores
 
     def __getitem__(self, item):
@@ -198,13 +251,111 @@ class ScoreMatrix(pd.DataFrame, SciUnit, TestWeighted):
 
     @property
     def norm_scores(self):
-        return self.applymap(lambda x: x.norm_score)
+        """Return the `norm_score` of each score, as a DataFrame of floats.
+
+        The scores of each type are normalized all at once (see
+        `norm_score_array`), and the result is cached until any score in
+        the matrix is replaced.
+        """
+        return self._cached()['norm_scores'].copy()
+
+    def _cached(self):
+        """Return the cache of values derived from the scores (the norm
+        scores, and the rank index once made), made if there is none.
+
+        The cache is dropped whenever a score in the matrix is replaced
+        through item assignment or the pandas indexers (see
+        `WriteTracking`).
+        """
+        cached = self.__dict__.get('_scores_cache')
+        if cached is None:
+            norms = pd.DataFrame(norm_score_array(self.values),
+                                 index=self.index, columns=self.columns)
+            cached = self.__dict__['_scores_cache'] = {'norm_scores': norms}
+        return cached
+
+    def _invalidate(self):
+        self.__dict__.pop('_scores_cache', None)
+
+    @property
+    def rank_index(self):
+        """An index of the ranks of the models on each test, made from the
+        norm scores when first needed, and again after any score is
+        replaced.
+
+        A dictionary of arrays with a row for each model and a column for
+        each test (however the matrix is oriented): 'norm_scores'; 'ranks'
+        (1 for the best model on the test, averaged over ties, and NaN for
+        models without a norm score); 'order' (the models' row numbers,
+        from best to worst); and 'counts' (of models with norm scores).
+        """
+        cached = self._cached()
+        if 'rank_index' not in cached:
+            norms = cached['norm_scores'].values
+            if self.transposed:
+                norms = norms.T
+            ranks = pd.DataFrame(norms).rank(ascending=False).values
+            cached['rank_index'] = {
+                'norm_scores': norms,
+                'ranks': ranks,
+                # Stable, with NaNs (no norm score) last.
+                'order': np.argsort(-norms, axis=0, kind='mergesort'),
+                'counts': (~np.isnan(norms)).sum(axis=0),
+                'models': {model: i for i, model in enumerate(self.models)},
+                'tests': {test: j for j, test in enumerate(self.tests)}}
+        return cached['rank_index']
+
+    def _position(self, index, kind, test_or_model):
+        if isinstance(test_or_model, str):
+            for item in getattr(self, kind):
+                if item.name == test_or_model:
+                    test_or_model = item
+                    break
+        try:
+            return index[kind][test_or_model]
+        except KeyError:
+            raise KeyError("No %s '%s'" % (kind[:-1], test_or_model))
 
     def stature(self, test, model):
         """Computes the relative rank of a model on a test compared to other
         models that were asked to take the test."""
-
-        return self[test].stature(model)
+        index = self.rank_index
+        return index['ranks'][self._position(index, 'models', model),
+                              self._position(index, 'tests', test)]
+
+    def percentile(self, test, model):
+        """The percentile rank of a model on a test: the percentage of the
+        models with norm scores on the test that it did at least as well as
+        (counting ties as half), i.e. 100 for the best model.  NaN if no
+        model has a norm score on the test."""
+        index = self.rank_index
+        j = self._position(index, 'tests', test)
+        n = index['counts'][j]
+        rank = index['ranks'][self._position(index, 'models', model), j]
+        if not n:
+            return np.nan
+        return 100.0*(n+1-rank)/n
+
+    def leaderboard(self, test, k=None):
+        """The `k` (by default, all) models with the best norm scores on a
+        test, as a Series of their norm scores from best to worst."""
+        index = self.rank_index
+        j = self._position(index, 'tests', test)
+        n = index['counts'][j]
+        rows = index['order'][:n if k is None else min(k, n), j]
+        return pd.Series(index['norm_scores'][rows, j],
+                         index=[self.models[i] for i in rows])
+
+    def ranking(self):
+        """The models' means of their norm scores over all of the tests
+        (weighted by the test weights), as a Series from best to worst."""
+        index = self.rank_index
+        if 'means' not in index:
+            means = np.dot(index['norm_scores'], self.weights)
+            rows = np.argsort(-means, kind='mergesort')
+            index['means'] = pd.Series(means[rows],
+                                       index=[self.models[i] for i in rows])
+        return index['means'].copy()
 
     @property
     def T(self):
@@ -257,6 +408,7 @@ class ScoreMatrix(pd.DataFrame, SciUnit, TestWeighted):
             cell.string = cell.string[:-5]
 
     def annotate_body(self, soup, df, show_mean):
+        colors = Score.value_colors(self.norm_scores.values)
         for i, row in enumerate(soup.find('tbody').findAll('tr')):
             cell = row.find('th')
             if self.transposed:
@@ -264,20 +416,22 @@ class ScoreMatrix(pd.DataFrame, SciUnit, TestWeighted):
             else:
                 cell['title'] = self.models[i].describe()
             for j, cell in enumerate(row.findAll('td')):
-                self.annotate_body_cell(cell, df, show_mean, i, j)
+                self.annotate_body_cell(cell, df, show_mean, i, j,
+                                        colors=colors)
 
-    def annotate_body_cell(self, cell, df, show_mean, i, j):
+    def annotate_body_cell(self, cell, df, show_mean, i, j, colors=None):
         if show_mean and j == 0:
             value = self.annotate_mean(cell, df, i)
+            rgb = Score.value_color(value)
         else:
             j_ = j-bool(show_mean)
             if self.transposed:
                 score = self[self.models[j_], self.tests[i]]
             else:
                 score = self[self.models[i], self.tests[j_]]
-            value = score.norm_score
             cell['title'] = score.describe(quiet=True)
-        rgb = Score.value_color(value)
+            rgb = tuple(colors[i, j_]) if colors is not None \
+                else Score.value_color(score.norm_score)
         cell['style'] = 'background-color: rgb(%d,%d,%d);' % rgb
 
     def annotate_mean(self, cell, df, i):
@@ -2,10 +2,15 @@
 
 import warnings
 
+import numpy as np
 import pandas as pd
+import quantities as pq
 
 from sciunit.models import Model
 from sciunit.tests import Test
+from sciunit.scores import Score, BooleanScore, NoneScore
+from sciunit.scores.base import norm_score_array
+from sciunit.scores.collections import WriteTracking
 
 
 class ScoreArrayM2M(pd.Series):
@@ -42,17 +47,36 @@ class ScoreArrayM2M(pd.Series):
 
     @property
     def norm_scores(self):
-        return self.map(lambda x: x.norm_score)
+        return pd.Series(norm_score_array(self.values), index=self.index)
 
 
-class ScoreMatrixM2M(pd.DataFrame):
+class ScoreMatrixM2M(WriteTracking, pd.DataFrame):
     """
     Represents a matrix of scores derived from TestM2M.
     Extends the pandas DataFrame such that models/observation are both
     columns and the index.
+
+    The DataFrame itself holds the raw score values as a contiguous float64
+    matrix (NaN where there is no value), and the normalized scores are
+    kept in another, so that they can be sorted, clustered or plotted at
+    numpy speed.  Score objects are only kept for the scores that were made
+    as such (e.g. by `compute_score`); the others (e.g. raw values from
+    `TestM2M.compute_pairwise`, or a matrix made with `from_arrays`) are
+    made from the raw values when first indexed.
+
+    Indexing the matrix (by model or test, by pair or by name), `score_at`
+    and `scores` give Score objects.  Since the DataFrame holds the raw
+    values, pandas accessors (`.loc`, `.iloc`, `.at`, `.values`, slices and
+    iteration) give those floats instead, with BooleanScores as 1.0/0.0 and
+    without units.  Writing raw values through those accessors (other than
+    straight into `.values`) resets the norm scores and any Score objects
+    for the cells that changed.
     """
 
-    def __init__(self, test, models, scores):
+    _metadata = ['test', 'models', 'predictions', '_scores', '_norm_scores']
+
+    def __init__(self, test, models, scores=None, predictions=None,
+                 raw_scores=None, norm_scores=None):
         if not test.observation:
             items = models
         else:
@@ -60,7 +84,18 @@ class ScoreMatrixM2M(pd.DataFrame):
             # only affects pandas.DataFrame; not test.name in individual scores
             test.name = "observation"
             items = [test]+models
-        super(ScoreMatrixM2M, self).__init__(data=scores, index=items,
+        n = len(items)
+        objects = np.empty((n, n), dtype=object)
+        if scores is not None:
+            # Score objects; None for those to be made from the raw values.
+            for i, row in enumerate(scores):
+                for j, score in enumerate(row):
+                    objects[i, j] = score
+            if raw_scores is None:
+                raw_scores = [[score_value(score) for score in row]
+                              for row in scores]
+        raw_scores = np.ascontiguousarray(raw_scores, dtype=np.float64)
+        super(ScoreMatrixM2M, self).__init__(data=raw_scores, index=items,
                                              columns=items)
         with warnings.catch_warnings():
             warnings.filterwarnings("ignore",
@@ -68,11 +103,133 @@ class ScoreMatrixM2M(pd.DataFrame):
                                              "to be created via a new "))
             self.test = test
             self.models = models
+            self.predictions = predictions
+            self._scores = objects
+            self._norm_scores = None if norm_scores is None \
+                else np.ascontiguousarray(norm_scores, dtype=np.float64)
+
+    @classmethod
+    def from_arrays(cls, test, models, raw_scores, norm_scores=None,
+                    predictions=None):
+        """Make a score matrix from a matrix of raw score values (and
+        optionally of norm scores), without any Score objects.
+
+        Scores of the test's `score_type` are made from the raw values when
+        they are indexed (and bound to the models and, if given, the
+        predictions).
+        """
+        return cls(test, models, predictions=predictions,
+                   raw_scores=raw_scores, norm_scores=norm_scores)
+
+    def copy(self, deep=True):
+        """Return a copy of the score matrix, with its scores and norm
+        scores.  (The Score objects themselves are shared.)"""
+        norm_scores = self._norm_scores
+        if deep and norm_scores is not None:
+            norm_scores = norm_scores.copy()
+        other = self.__class__(self.test, self.models,
+                               predictions=self.predictions,
+                               raw_scores=self.values.copy() if deep
+                               else self.values,
+                               norm_scores=norm_scores)
+        other._scores = self._scores.copy() if deep else self._scores
+        return other
+
+    def _invalidate(self):
+        """Drop the norm scores, and the Score objects whose raw values
+        have been overwritten."""
+        self._norm_scores = None
+        values = self.values
+        if values.shape != self._scores.shape:
+            return
+        for i, j in zip(*np.nonzero([[score is not None for score in row]
+                                     for row in self._scores])):
+            value = score_value(self._scores[i, j])
+            try:
+                new = float(values[i, j])
+            except (TypeError, ValueError):
+                new = np.nan
+            if not (value == new or (np.isnan(value) and np.isnan(new))):
+                self._scores[i, j] = None
+
+    @property
+    def raw_scores(self):
+        """The raw score values, as a float64 array."""
+        return self.values
+
+    @property
+    def norm_score_array(self):
+        """The normalized scores, as a float64 array (computed once)."""
+        if self._norm_scores is None:
+            # Cells without a Score object yet are normalized straight from
+            # their raw values, without making one.
+            lazy = np.array([score is None for score in self._scores.ravel()],
+                            dtype=bool).reshape(self._scores.shape)
+            norms = np.full(self._scores.shape, np.nan)
+            fill = lazy & ~np.isnan(self.values)
+            if fill.any():
+                score_type = self.test.score_type
+                if score_type.has_vectorized_norm():
+                    norms[fill] = score_type.norm_scores(self.values[fill])
+                else:
+                    for i, j in zip(*np.nonzero(fill)):
+                        self.score_at(i, j)
+                    lazy = lazy & ~fill
+            norms[~lazy] = norm_score_array(self._scores[~lazy])
+            self._norm_scores = np.ascontiguousarray(norms)
+        return self._norm_scores
+
+    @property
+    def scores(self):
+        """All of the scores, as a 2D object array."""
+        n = len(self.index)
+        for i in range(n):
+            for j in range(n):
+                self.score_at(i, j)
+        return self._scores
+
+    def score_at(self, i, j):
+        """Return the score in row `i` and column `j`, making it from the raw
+        value if it has not been made yet."""
+        score = self._scores[i, j]
+        if score is None:
+            value = self.values[i, j]
+            if np.isnan(value):
+                score = NoneScore(None)
+            else:
+                score_type = self.test.score_type
+                value = bool(value) if issubclass(score_type, BooleanScore) \
+                    else float(value)
+                score = score_type(value)
+            model1, model2 = self.test._pair_models(self.models, i, j)
+            if self.predictions is not None:
+                self.test._bind_score(score, self.predictions[i],
+                                      self.predictions[j], model1, model2)
+            else:
+                score.model1, score.model2 = model1, model2
+                score.test = self.test
+            self._scores[i, j] = score
+        return score
+
+    def add_models(self, models, skip_incapable=False, stop_on_error=True,
+                   executor=None, max_workers=None):
+        """Return a new score matrix that also includes `models`.
+
+        Only the new models' predictions and the new rows and columns of
+        scores are computed (see `TestM2M.judge_added_models`).
+        """
+        return self.test.judge_added_models(self, models,
+                                            skip_incapable=skip_incapable,
+                                            stop_on_error=stop_on_error,
+                                            executor=executor,
+                                            max_workers=max_workers)
 
     def __getitem__(self, item):
         if isinstance(item, (Test, Model)):
+            i = self.index.get_loc(item)
             result = ScoreArrayM2M(self.test, self.models,
-                                   scores=self.loc[item, :])
+                                   scores=[self.score_at(i, j) for j in
+                                           range(len(self.columns))])
         elif isinstance(item, str):
             result = self.get_by_name(item)
         elif isinstance(item, (list, tuple)) and len(item) == 2:
@@ -94,18 +251,40 @@ class ScoreMatrixM2M(pd.DataFrame):
 
     def get_group(self, x):
         if isinstance(x[0], (Test, Model)) and isinstance(x[1], (Test, Model)):
-            return self.loc[x[0], x[1]]
+            return self.score_at(self.index.get_loc(x[0]),
+                                 self.columns.get_loc(x[1]))
         elif isinstance(x[0], str):
             return self.__getitem__(x[0]).__getitem__(x[1])
         raise TypeError("Expected test/model pair")
 
     def __getattr__(self, name):
-        if name in ['score', 'norm_score', 'related_data']:
-            attr = self.applymap(lambda x: getattr(x, name))
+        if name == 'score':
+            attr = pd.DataFrame(self.values, index=self.index,
+                                columns=self.columns)
+        elif name == 'norm_score':
+            attr = self.norm_scores
+        elif name == 'related_data':
+            attr = pd.DataFrame(self.scores, index=self.index,
+                                columns=self.columns)\
+                .applymap(lambda x: x.related_data)
         else:
             attr = super(ScoreMatrixM2M, self).__getattribute__(name)
         return attr
 
     @property
     def norm_scores(self):
-        return self.applymap(lambda x: x.norm_score)
+        return pd.DataFrame(self.norm_score_array, index=self.index,
+                            columns=self.columns)
+
+
+def score_value(score):
+    """The raw value of a score as a float (NaN if it has none)."""
+    value = getattr(score, 'score', None) if isinstance(score, Score) \
+        else None
+    if isinstance(value, pq.Quantity):
+        value = value.magnitude
+    try:
+        return float(value)
+    except (TypeError, ValueError):  # E.g. None or an exception.
+        return np.nan
+
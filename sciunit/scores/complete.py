@@ -13,6 +13,7 @@ import quantities as pq
 from sciunit import utils
 from sciunit import errors
 from .base import Score
+from .block import ScoreBlock
 from .incomplete import InsufficientDataScore
 
 
@@ -29,11 +30,23 @@ class BooleanScore(Score):
         """Compute whether the observation equals the prediction."""
         return BooleanScore(observation == prediction)
 
+    @classmethod
+    def compute_many(cls, observations, predictions):
+        """Compute whether each observation equals each prediction
+        (broadcasting arrays of them against each other)."""
+        values = np.asarray(np.asarray(observations) ==
+                            np.asarray(predictions), dtype=bool)
+        return ScoreBlock(cls, values)
+
     @property
     def norm_score(self):
         """Return 1.0 for a True score and 0.0 for False score."""
         return 1.0 if self.score else 0.0
 
+    @classmethod
+    def norm_scores(cls, values):
+        return np.asarray(values).astype(bool).astype(float)
+
     def __str__(self):
         return 'Pass' if self.score else 'Fail'
 
@@ -64,6 +77,9 @@ class ZScore(Score):
                 p_value = prediction  # Use the prediction (assume numeric).
         o_mean = observation['mean']
         o_std = observation['std']
+        bare = utils.magnitudes(o_mean, o_std, p_value)
+        if bare is not None:  # Compute on floats, without unit algebra.
+            o_mean, o_std, p_value = bare
         value = (p_value - o_mean)/o_std
         value = utils.assert_dimensionless(value)
         if np.isnan(value):
@@ -72,6 +88,28 @@ class ZScore(Score):
             score = ZScore(value)
         return score
 
+    @classmethod
+    def compute_many(cls, observations, predictions):
+        """Compute z-scores for arrays of observation means and standard
+        deviations against one prediction or an array of predictions (of
+        means or values), in one vectorized pass."""
+        p_value = cls.extract_many(predictions, ['mean', 'value'],
+                                   required=False)
+        o_mean = cls.extract_many(observations, ['mean'])
+        o_std = cls.extract_many(observations, ['std'])
+        bare = utils.magnitudes(o_mean, o_std, p_value)
+        if bare is not None:
+            o_mean, o_std, p_value = bare
+        values = (p_value - o_mean)/o_std
+        values = np.atleast_1d(utils.assert_dimensionless(values))
+        return ScoreBlock(cls, values.astype(float))
+
+    @classmethod
+    def reduce_stream(cls, chunks):
+        """Accumulate the mean, standard deviation and size of a streamed
+        prediction, one chunk at a time."""
+        return utils.RunningStats().update_all(chunks).summary()
+
     @property
     def norm_score(self):
         """Return the normalized score.
@@ -82,6 +120,12 @@ class ZScore(Score):
         cdf = (1.0 + math.erf(self.score / math.sqrt(2.0))) / 2.0
         return 1 - 2*math.fabs(0.5 - cdf)
 
+    @classmethod
+    def norm_scores(cls, values):
+        # 1 - 2|0.5 - cdf(z)| simplifies to 1 - |erf(z/sqrt(2))|.
+        values = np.asarray(values, dtype=float)
+        return 1 - np.abs(utils.erf(values / math.sqrt(2.0)))
+
     def __str__(self):
         return 'Z = %.2f' % self.score
 
@@ -104,6 +148,9 @@ class CohenDScore(ZScore):
         p_std = prediction['std']
         o_mean = observation['mean']
         o_std = observation['std']
+        bare = utils.magnitudes(o_mean, o_std, p_mean, p_std)
+        if bare is not None:  # Compute on floats, without unit algebra.
+            o_mean, o_std, p_mean, p_std = bare
         try:  # Try to pool taking samples sizes into account.
             p_n = prediction['n']
             o_n = observation['n']
@@ -114,6 +161,28 @@ class CohenDScore(ZScore):
         value = utils.assert_dimensionless(value)
         return CohenDScore(value)
 
+    @classmethod
+    def compute_many(cls, observations, predictions):
+        """Compute Cohen's Ds for arrays of observation and prediction means
+        and standard deviations (and sample sizes, if both have them), in
+        one vectorized pass."""
+        p_mean = cls.extract_many(predictions, ['mean'])
+        p_std = cls.extract_many(predictions, ['std'])
+        o_mean = cls.extract_many(observations, ['mean'])
+        o_std = cls.extract_many(observations, ['std'])
+        bare = utils.magnitudes(o_mean, o_std, p_mean, p_std)
+        if bare is not None:
+            o_mean, o_std, p_mean, p_std = bare
+        try:  # Try to pool taking samples sizes into account.
+            p_n = cls.extract_many(predictions, ['n'])
+            o_n = cls.extract_many(observations, ['n'])
+            s = (((p_n-1)*(p_std**2) + (o_n-1)*(o_std**2))/(p_n+o_n-2))**0.5
+        except KeyError:  # If sample sizes are not available.
+            s = (p_std**2 + o_std**2)**0.5
+        values = (p_mean - o_mean)/s
+        values = np.atleast_1d(utils.assert_dimensionless(values))
+        return ScoreBlock(cls, values.astype(float))
+
     def __str__(self):
         return 'D = %.2f' % self.score
 
@@ -143,10 +212,38 @@ class RatioScore(Score):
 
         obs, pred = cls.extract_means_or_values(observation, prediction,
                                                 key=key)
+        bare = utils.magnitudes(obs, pred)
+        if bare is not None:  # Compute on floats, without unit algebra.
+            obs, pred = bare
         value = pred / obs
         value = utils.assert_dimensionless(value)
         return RatioScore(value)
 
+    @classmethod
+    def compute_many(cls, observations, predictions, key=None):
+        """Compute ratios for arrays of observations and predictions (of
+        means, values or `key`), in one vectorized pass."""
+        keys = ([key] if key is not None else []) + ['mean', 'value']
+        obs = cls.extract_many(observations, keys, required=False)
+        pred = cls.extract_many(predictions, keys, required=False)
+        bare = utils.magnitudes(obs, pred)
+        if bare is not None:
+            obs, pred = bare
+        values = pred / obs
+        values = np.atleast_1d(utils.assert_dimensionless(values))
+        values = values.astype(float)
+        if (values < 0).any():
+            raise errors.InvalidScoreError(("RatioScore was computed with "
+                                            "a negative value, but a "
+                                            "RatioScore must be "
+                                            "non-negative."))
+        return ScoreBlock(cls, values)
+
+    @classmethod
+    def reduce_stream(cls, chunks):
+        """Accumulate the mean of a streamed prediction, as ZScore does."""
+        return utils.RunningStats().update_all(chunks).summary()
+
     @property
     def norm_score(self):
         """Return 1.0 for a ratio of 1, falling to 0.0 for extremely small
@@ -155,6 +252,11 @@ class RatioScore(Score):
         cdf = (1.0 + math.erf(score / math.sqrt(2.0))) / 2.0
         return 1 - 2*math.fabs(0.5 - cdf)
 
+    @classmethod
+    def norm_scores(cls, values):
+        values = np.log10(np.asarray(values, dtype=float))
+        return 1 - np.abs(utils.erf(values / math.sqrt(2.0)))
+
     def __str__(self):
         return 'Ratio = %.2f' % self.score
 
@@ -179,6 +281,10 @@ class PercentScore(Score):
         """Return 1.0 for a percent score of 100, and 0.0 for 0."""
         return float(self.score)/100
 
+    @classmethod
+    def norm_scores(cls, values):
+        return np.asarray(values, dtype=float)/100
+
     def __str__(self):
         return '%.1f%%' % self.score
 
@@ -202,10 +308,248 @@ class FloatScore(Score):
     @classmethod
     def compute_ssd(cls, observation, prediction):
         """Compute sum-squared diff between observation and prediction."""
+        if np.shape(observation) == np.shape(prediction):
+            # Without full-size temporaries (see SSDScore).
+            score = SSDScore.compute(observation, prediction)
+            if isinstance(score, SSDScore):
+                return FloatScore(score.score)
         # The sum of the squared differences.
         value = ((observation - prediction)**2).sum()
         score = FloatScore(value)
         return score
 
+    @classmethod
+    def compute_ssd_many(cls, observations, predictions):
+        """Compute the sum-squared diff between each row of `observations`
+        and of `predictions` (2D arrays, or 1D arrays broadcast against
+        them), in one vectorized pass."""
+        values = ((observations - predictions)**2).sum(axis=-1)
+        values, units = ScoreBlock.strip_units(values)
+        return ScoreBlock(cls, np.atleast_1d(values).astype(float),
+                          units=units)
+
     def __str__(self):
         return '%.3g' % self.score
+
+
+class ErrorMetricScore(FloatScore):
+    """Abstract base class for the error between a prediction and an
+    observation of the same shape (e.g. two traces).
+
+    The units of the arrays are checked for compatibility and stripped
+    once, and the error is computed `chunk_size` elements at a time in
+    reused buffers, so that even arrays of 10^8 samples (e.g. memory-mapped
+    ones) need only O(chunk_size) extra memory.  Arrays of more than
+    `parallel_threshold` elements are split across threads (see
+    `map_chunks`, built on `Score.map_segments`).
+    """
+
+    chunk_size = 2**16
+    """The number of elements to process at a time."""
+
+    @classmethod
+    def compute(cls, observation, prediction):
+        """Compute the error of a prediction (an array, or a dictionary with
+        'values') against an observation of the same shape."""
+        x, y, factor, units = cls.extract_arrays(observation, prediction)
+        if not x.size:
+            return InsufficientDataScore("There were no values to compare")
+        value = cls.compute_value(x, y, factor)
+        if isinstance(value, Score):  # E.g. an InsufficientDataScore.
+            return value
+        value = float(value)
+        if np.isnan(value):
+            return InsufficientDataScore("One of the input values was NaN")
+        units = cls.value_units(units)
+        return cls(value*units if units is not None else value)
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        """Compute the error's value from the observation's values `x` and
+        the prediction's values `y` (both flat), where `y*factor` is in the
+        units of `x`.  May return a score instead (e.g. an
+        InsufficientDataScore), if the error cannot be computed."""
+        raise NotImplementedError(("%s does not implement compute_value."
+                                   % cls.__name__))
+
+    @classmethod
+    def value_units(cls, units):
+        """The units of the error, for arrays in `units` (None for none)."""
+        return units
+
+    @classmethod
+    def extract_arrays(cls, observation, prediction):
+        """Return the values of the observation and prediction as flat
+        arrays without units, the factor converting the prediction's values
+        to the observation's units, and those units (or None).
+        """
+        x, y = [data['values'] if isinstance(data, dict) else data
+                for data in (observation, prediction)]
+        units, factor = None, 1.0
+        if isinstance(x, pq.Quantity) or isinstance(y, pq.Quantity):
+            if not (isinstance(x, pq.Quantity) and
+                    isinstance(y, pq.Quantity)):
+                raise errors.InvalidScoreError(("Only one of the observation "
+                                                "and prediction has units."))
+            try:
+                factor = utils.conversion_factor(y.units, x.units)
+            except ValueError:
+                raise errors.InvalidScoreError(("The prediction's units (%s) "
+                                                "are incompatible with the "
+                                                "observation's (%s)."
+                                                % (y.units, x.units)))
+            units = x.units
+            x, y = x.magnitude, y.magnitude
+        x, y = np.asarray(x), np.asarray(y)
+        if x.shape != y.shape:
+            raise errors.InvalidScoreError(("The observation and prediction "
+                                            "shapes differ: %s and %s"
+                                            % (x.shape, y.shape)))
+        return x.reshape(-1), y.reshape(-1), factor, units
+
+    @classmethod
+    def iter_chunks(cls, x, y, factor, out=None):
+        """Yield each chunk of `y*factor - x` (the prediction's errors), in
+        the same reused buffer `out` (by default, a new one)."""
+        n = len(x)
+        if out is None:
+            out = np.empty(min(cls.chunk_size, n))
+        size = len(out)
+        for start in range(0, n, size):
+            stop = min(start + size, n)
+            chunk = out[:stop - start]
+            if factor == 1.0:
+                np.subtract(y[start:stop], x[start:stop], out=chunk)
+            else:
+                np.multiply(y[start:stop], factor, out=chunk)
+                np.subtract(chunk, x[start:stop], out=chunk)
+            yield chunk
+
+    @classmethod
+    def map_chunks(cls, func, x, y, factor):
+        """Return `func(chunk)` for each chunk of the prediction's errors
+        (see `iter_chunks`), in order.  Large arrays are split into
+        segments of whole chunks, each processed in its own thread with its
+        own buffer, so the results are the same as those of one thread."""
+        def segment(start, stop):
+            return [func(chunk) for chunk in
+                    cls.iter_chunks(x[start:stop], y[start:stop], factor)]
+        return cls.map_segments(segment, len(x), cls.chunk_size)
+
+
+class SSDScore(ErrorMetricScore):
+    """A sum of squared differences between prediction and observation."""
+
+    _description = ('The sum of the squared differences between the '
+                    'prediction and the observation')
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        return sum(cls.map_chunks(lambda chunk: np.dot(chunk, chunk),
+                                  x, y, factor))
+
+    @classmethod
+    def value_units(cls, units):
+        return units**2 if units is not None else None
+
+
+class RMSEScore(ErrorMetricScore):
+    """A root mean squared error between prediction and observation."""
+
+    _description = ('The square root of the mean squared difference between '
+                    'the prediction and the observation')
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        return np.sqrt(SSDScore.compute_value(x, y, factor)/len(x))
+
+
+class MAEScore(ErrorMetricScore):
+    """A mean absolute error between prediction and observation."""
+
+    _description = ('The mean absolute difference between the prediction and '
+                    'the observation')
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        return sum(cls.map_chunks(lambda chunk: np.abs(chunk, out=chunk).sum(),
+                                  x, y, factor))/len(x)
+
+
+class MaxAbsErrorScore(ErrorMetricScore):
+    """The largest absolute difference between prediction and observation."""
+
+    _description = ('The largest absolute difference between the prediction '
+                    'and the observation')
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        # np.max, unlike max(), gives NaN wherever the NaN chunk falls.
+        return np.max(np.asarray(cls.map_chunks(
+            lambda chunk: np.abs(chunk, out=chunk).max(), x, y, factor)))
+
+
+class NCCScore(ErrorMetricScore):
+    """A normalized cross-correlation (Pearson correlation at zero lag)
+    between prediction and observation.
+
+    A float from -1.0 to 1.0, where 1.0 is a perfect match in shape
+    (regardless of offset and scale).
+    """
+
+    _allowed_types = (float,)
+
+    _description = ('The correlation between the prediction and the '
+                    'observation')
+
+    def _check_score(self, score):
+        if not (-1.0 <= score <= 1.0):
+            raise errors.InvalidScoreError(("Score of %f must be in "
+                                            "range -1.0-1.0" % score))
+
+    @classmethod
+    def compute_value(cls, x, y, factor):
+        # Two passes over the data: the means, then the centered sums of
+        # products, in two reused buffers per segment.  (The correlation
+        # does not depend on the units, so `factor` is not needed.)
+        x_mean, y_mean = x.mean(), y.mean()
+
+        def segment(start, stop):
+            size = min(cls.chunk_size, stop - start)
+            x_chunk, y_chunk = np.empty(size), np.empty(size)
+            sums = []
+            for a in range(start, stop, size):
+                b = min(a + size, stop)
+                xc, yc = x_chunk[:b - a], y_chunk[:b - a]
+                np.subtract(x[a:b], x_mean, out=xc)
+                np.subtract(y[a:b], y_mean, out=yc)
+                sums.append((np.dot(xc, xc), np.dot(yc, yc), np.dot(xc, yc)))
+            return sums
+
+        sxx = syy = sxy = 0.0
+        for xx, yy, xy in cls.map_segments(segment, len(x), cls.chunk_size):
+            sxx += xx
+            syy += yy
+            sxy += xy
+        if np.isnan(sxy):
+            return np.nan
+        if not (sxx and syy):
+            return InsufficientDataScore(("The observation or the prediction "
+                                          "has zero variance"))
+        return min(max(sxy/np.sqrt(sxx*syy), -1.0), 1.0)
+
+    @classmethod
+    def value_units(cls, units):
+        return None
+
+    @property
+    def norm_score(self):
+        """Return 1.0 for a correlation of 1, and 0.0 for -1."""
+        return (1.0 + self.score)/2
+
+    @classmethod
+    def norm_scores(cls, values):
+        return (1.0 + np.asarray(values, dtype=float))/2
+
+    def __str__(self):
+        return 'NCC = %.3f' % self.score
@@ -0,0 +1,264 @@
+"""Score types comparing distributions of samples.
+
+Each compares the samples of an observation and a prediction (e.g.
+inter-spike intervals), given as arrays or as dictionaries with a 'samples'
+array.  They are computed with sorting, searchsorted and histogram kernels,
+in O(n log n) time and O(n) memory, so they work on millions of samples.
+Beyond `parallel_threshold` samples, the searchsorted and histogram kernels
+are split across threads (see `Score.map_segments`).
+"""
+
+from __future__ import division
+
+import numpy as np
+import quantities as pq
+
+from sciunit import errors
+from sciunit import utils
+from .base import Score
+from .incomplete import InsufficientDataScore
+
+__all__ = ['DistributionScore', 'KSScore', 'WassersteinScore',
+           'EnergyDistanceScore', 'KLDivergenceScore']
+
+
+class DistributionScore(Score):
+    """Abstract base class for scores comparing distributions of samples."""
+
+    _allowed_types = (float, pq.Quantity,)
+
+    def _check_score(self, score):
+        if isinstance(score, pq.Quantity) and score.size != 1:
+            raise errors.InvalidScoreError("Score must have size 1.")
+
+    @classmethod
+    def compute(cls, observation, prediction):
+        """Compute the score from the samples of an observation and a
+        prediction."""
+        x, y, units = cls.extract_samples(observation, prediction)
+        if not (len(x) and len(y)):
+            return InsufficientDataScore("There were no samples to compare")
+        score = cls(cls.compute_value(x, y, units))
+        scale = float(np.sqrt((x.var() + y.var())/2))
+        score.scale = scale*units if units is not None else scale
+        return score
+
+    scale = None
+    """The scale of the samples: their pooled standard deviation (in the
+    units of the observation's samples).  Set by `compute`."""
+
+    scale_power = 1
+    """The power of the samples' units in the units of the score, and so
+    the power of `scale` by which `norm_score` divides the score."""
+
+    @property
+    def norm_score(self):
+        """Return 1.0 for a distance of 0, falling towards 0.0 as the
+        distance grows, as 1/(1+d/s**p) for distance d and the samples'
+        `scale` s (to the `scale_power` p), so that it does not depend on
+        the units of the samples.  Without a scale (e.g. for a score made
+        from a raw value), as 1/(1+d)."""
+        d = float(getattr(self.score, 'magnitude', self.score))
+        if self.scale is None:
+            return 1.0/(1.0 + d)
+        s = float(getattr(self.scale, 'magnitude', self.scale))
+        if not s:  # All the samples are equal.
+            return 1.0 if d == 0 else 0.0
+        return 1.0/(1.0 + d/s**self.scale_power)
+
+    @classmethod
+    def compute_value(cls, x, y, units):
+        """Compute the score's value from two sorted float arrays of samples
+        (in `units`, which may be None)."""
+        raise NotImplementedError(("%s does not implement compute_value."
+                                   % cls.__name__))
+
+    @classmethod
+    def extract_samples(cls, observation, prediction):
+        """Extract the samples of an observation and a prediction as sorted
+        1D float arrays without NaNs, with the prediction's rescaled to the
+        observation's units.  Returns the two arrays and the units (or None
+        if the samples have none).
+        """
+        x = observation.get('samples') if isinstance(observation, dict) \
+            else observation
+        y = prediction.get('samples') if isinstance(prediction, dict) \
+            else prediction
+        if x is None or y is None:
+            raise KeyError("Both the observation and the prediction must "
+                           "have samples")
+        units = None
+        if isinstance(x, pq.Quantity) or isinstance(y, pq.Quantity):
+            if not (isinstance(x, pq.Quantity) and
+                    isinstance(y, pq.Quantity)):
+                raise errors.InvalidScoreError(("Only one of the observation "
+                                                "and prediction samples has "
+                                                "units."))
+            units = x.units
+            try:
+                factor = utils.conversion_factor(y.units, units)
+            except ValueError:
+                raise errors.InvalidScoreError(("The prediction's units (%s) "
+                                                "are incompatible with the "
+                                                "observation's (%s)."
+                                                % (y.units, units)))
+            x, y = x.magnitude, y.magnitude*factor
+        x = np.ravel(np.asarray(x, dtype=float))
+        y = np.ravel(np.asarray(y, dtype=float))
+        return np.sort(x[~np.isnan(x)]), np.sort(y[~np.isnan(y)]), units
+
+    @classmethod
+    def map_cdf_differences(cls, func, x, y):
+        """Evaluate the empirical CDFs of the sorted samples `x` and `y` at
+        every sample, and return `func(differences, widths)` for each
+        segment of the intervals between consecutive samples, in order,
+        where `differences` are the differences between the CDFs on those
+        intervals and `widths` their widths.  There is one segment, unless
+        there are enough samples to split them across threads."""
+        points = np.concatenate([x, y])
+        points.sort(kind='mergesort')
+
+        def segment(start, stop):
+            left = points[start:stop]
+            cdf_x = np.searchsorted(x, left, side='right') / len(x)
+            cdf_y = np.searchsorted(y, left, side='right') / len(y)
+            return [func(cdf_x - cdf_y, points[start+1:stop+1] - left)]
+        return cls.map_segments(segment, len(points) - 1)
+
+    @classmethod
+    def histogram(cls, samples, edges):
+        """Count the samples in each bin between `edges`, in segments
+        across threads if there are many samples."""
+        return sum(cls.map_segments(
+            lambda start, stop: [np.histogram(samples[start:stop],
+                                              bins=edges)[0]],
+            len(samples)))
+
+
+class KSScore(DistributionScore):
+    """A Kolmogorov-Smirnov distance.
+
+    The largest difference between the empirical cumulative distribution
+    functions of the observation and the prediction, from 0.0 (identical)
+    to 1.0.
+    """
+
+    _allowed_types = (float,)
+
+    _description = ('The largest difference between the cumulative '
+                    'distributions of the observation and prediction samples')
+
+    def _check_score(self, score):
+        if not (0.0 <= score <= 1.0):
+            raise errors.InvalidScoreError(("Score of %f must be in "
+                                            "range 0.0-1.0" % score))
+
+    @classmethod
+    def compute_value(cls, x, y, units):
+        # Both CDFs reach 1 at the last sample, so the largest difference
+        # is on one of the intervals between samples.
+        return float(max(cls.map_cdf_differences(
+            lambda differences, widths: np.abs(differences).max(), x, y)))
+
+    @property
+    def norm_score(self):
+        """Return 1.0 for a distance of 0.0, and 0.0 for 1.0."""
+        return 1.0 - self.score
+
+    @classmethod
+    def norm_scores(cls, values):
+        return 1.0 - np.asarray(values, dtype=float)
+
+    def __str__(self):
+        return 'KS = %.3f' % self.score
+
+
+class WassersteinScore(DistributionScore):
+    """A Wasserstein-1 (earth mover's) distance.
+
+    The area between the empirical cumulative distribution functions of
+    the observation and the prediction, in the units of the samples.
+    """
+
+    _description = ('The area between the cumulative distributions of the '
+                    'observation and prediction samples')
+
+    @classmethod
+    def compute_value(cls, x, y, units):
+        value = float(sum(cls.map_cdf_differences(
+            lambda differences, widths: np.dot(np.abs(differences), widths),
+            x, y)))
+        return value*units if units is not None else value
+
+    def __str__(self):
+        return 'W = %.3g' % self.score
+
+
+class EnergyDistanceScore(DistributionScore):
+    """An energy distance.
+
+    The square root of twice the integrated squared difference between the
+    empirical cumulative distribution functions of the observation and the
+    prediction (in the square root of the units of the samples).
+    """
+
+    _description = ('The energy distance between the observation and '
+                    'prediction samples')
+
+    scale_power = 0.5
+
+    @classmethod
+    def compute_value(cls, x, y, units):
+        value = float(np.sqrt(2*sum(cls.map_cdf_differences(
+            lambda differences, widths: np.dot(differences**2, widths),
+            x, y))))
+        return value*units**0.5 if units is not None else value
+
+    def __str__(self):
+        return 'E = %.3g' % self.score
+
+
+class KLDivergenceScore(DistributionScore):
+    """A Kullback-Leibler divergence of binned samples.
+
+    The divergence of the prediction's histogram from the observation's,
+    with both binned alike (see `bins`), in nats.
+    """
+
+    _allowed_types = (float,)
+
+    _description = ('The Kullback-Leibler divergence of the histogram of the '
+                    'prediction samples from that of the observation samples')
+
+    bins = 'auto'
+    """The bins (or a method of choosing them, see `numpy.histogram`)."""
+
+    pseudocount = 0.5
+    """Added to the count of every bin, so that empty bins in the prediction
+    do not make the divergence infinite."""
+
+    def _check_score(self, score):
+        if score < 0.0:
+            raise errors.InvalidScoreError(("Score of %f must be "
+                                            "non-negative" % score))
+
+    @classmethod
+    def compute_value(cls, x, y, units):
+        edges = np.histogram_bin_edges(np.concatenate([x, y]), bins=cls.bins)
+        p = cls.histogram(x, edges) + cls.pseudocount
+        q = cls.histogram(y, edges) + cls.pseudocount
+        p, q = p/p.sum(), q/q.sum()
+        return float(max(np.dot(p, np.log(p/q)), 0.0))
+
+    @property
+    def norm_score(self):
+        """Return 1.0 for a divergence of 0, falling to 0.0 for large
+        divergences."""
+        return float(np.exp(-self.score))
+
+    @classmethod
+    def norm_scores(cls, values):
+        return np.exp(-np.asarray(values, dtype=float))
+
+    def __str__(self):
+        return 'KL = %.3g' % self.score
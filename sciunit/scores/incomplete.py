@@ -4,6 +4,8 @@ These include details about the various possible reasons
 that a particular combination of model and test could not be completed.
 """
 
+import numpy as np
+
 from .base import Score
 from sciunit.errors import InvalidScoreError
 
@@ -24,6 +26,41 @@ class NoneScore(Score):
     def norm_score(self):
         return None
 
+    @classmethod
+    def norm_scores(cls, values):
+        return np.full(len(values), np.nan)
+
+    @classmethod
+    def interned(cls, score=None):
+        """Return a shared instance of this score type for `score` (a
+        reason string, or None), instead of making a new one.
+
+        Useful as a placeholder for the many cells of a score matrix that
+        carry no data.  A shared instance cannot be modified (e.g. bound to
+        a model or test), but copies of it can.
+        """
+        if '_interned' not in cls.__dict__:
+            cls._interned = {}
+        if score not in cls._interned:
+            instance = cls(score)
+            instance.__dict__['_interned'] = True
+            cls._interned[score] = instance
+        return cls._interned[score]
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_interned'):
+            raise AttributeError("Shared (interned) %s cannot be modified; "
+                                 "modify a copy instead."
+                                 % self.__class__.__name__)
+        super(NoneScore, self).__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if self.__dict__.get('_interned'):
+            raise AttributeError("Shared (interned) %s cannot be modified; "
+                                 "modify a copy instead."
+                                 % self.__class__.__name__)
+        super(NoneScore, self).__delattr__(name)
+
     def __str__(self):
         return 'Unknown'
 
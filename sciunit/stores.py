@@ -0,0 +1,298 @@
+"""Stores for predictions that are not bound directly to scores.
+
+When a test has a prediction store, each score keeps only a key into the
+store, from which `score.prediction` (and `score.related_data`) retrieve the
+data on demand.  When a test's `score_binding` is 'summary', each score also
+keeps a lightweight summary of its prediction (type, shape, dtype, units
+and a hash).  A `SpillingPredictionStore` keeps the stored data within a
+memory budget by spilling arrays to disk.
+"""
+
+import os
+import atexit
+import shutil
+import hashlib
+import weakref
+import itertools
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import quantities as pq
+
+
+def summarize(data):
+    """Summarize a prediction (or other data) without keeping a reference
+    to it.
+
+    Returns a dictionary with the type of the data and, for arrays, its
+    shape, dtype, units (for quantities) and a hash of its contents; for
+    dictionaries, a summary of each value; and for scalars and strings, the
+    value itself.
+    """
+    summary = {'type': type(data).__name__}
+    if isinstance(data, dict):
+        summary['items'] = {key: summarize(value)
+                            for key, value in data.items()}
+    elif isinstance(data, np.ndarray):
+        summary['shape'] = data.shape
+        summary['dtype'] = str(data.dtype)
+        if isinstance(data, pq.Quantity):
+            summary['units'] = data.dimensionality.string
+        summary['hash'] = array_hash(data)
+    elif isinstance(data, (bool, int, float, complex, str, type(None))):
+        summary['value'] = data
+    return summary
+
+
+def array_hash(array):
+    """A hash of the contents of a numpy array, or None if its contents
+    cannot be hashed (e.g. arrays of objects)."""
+    if array.dtype.hasobject:
+        return None
+    buffer = np.ascontiguousarray(array).view(np.uint8)
+    return hashlib.sha1(buffer).hexdigest()
+
+
+class PredictionStore(object):
+    """An in-memory store of predictions, keyed by integer ids.
+
+    Each prediction is stored once, however many scores refer to it (e.g.
+    the members of a `TestFamily`, which all share one prediction).  Data
+    stored for owners (see `bind`) are removed once all of their owners
+    have been garbage collected.
+    """
+
+    def __init__(self):
+        self._data = {}  # key -> prediction
+        self._keys = {}  # id(prediction) -> key
+        self._counter = itertools.count()
+        self._counts = {}  # key -> number of live owners
+        self._owners = {}  # id(weak reference to owner) -> weak reference
+
+    def put(self, data):
+        """Store `data` and return its key."""
+        key = self._key(data)
+        if key is None:
+            key = next(self._counter)
+            self._data[key] = data
+            self._keys[id(data)] = key
+        return key
+
+    def _key(self, data):
+        """The key under which `data` itself is stored, or None."""
+        key = self._keys.get(id(data))
+        if key is not None and self._data.get(key) is not data:
+            return None  # A stale id, reused by another object.
+        return key
+
+    def bind(self, data, owner):
+        """Store `data` for `owner` (e.g. a score) and return its key.  The
+        data are removed when all of their owners have been garbage
+        collected."""
+        key = self.put(data)
+        self.acquire(key, owner)
+        return key
+
+    def acquire(self, key, owner):
+        """Keep the data stored under `key` for as long as `owner` lives."""
+        def release(ref):
+            if self._owners.pop(id(ref), None) is not None:
+                self.release(key)
+
+        ref = weakref.ref(owner, release)
+        self._owners[id(ref)] = ref
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def release(self, key):
+        """Drop one owner of the data stored under `key`, removing the data
+        when it was the last."""
+        count = self._counts.get(key, 0) - 1
+        if count > 0:
+            self._counts[key] = count
+        else:
+            self._counts.pop(key, None)
+            self.discard(key)
+
+    def get(self, key):
+        """Return the data stored under `key`."""
+        return self._data[key]
+
+    def discard(self, key):
+        """Remove the data stored under `key`, if any."""
+        self._counts.pop(key, None)
+        if key in self._data:
+            self._keys.pop(id(self._data.pop(key)), None)
+
+    def clear(self):
+        """Remove all of the stored data."""
+        self._data.clear()
+        self._keys.clear()
+        self._counts.clear()
+        self._owners.clear()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Owners are not tracked across copies of the store.
+        state['_counts'] = {}
+        state['_owners'] = {}
+        return state
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def data_nbytes(data):
+    """The number of bytes of array data held in memory by `data` (arrays,
+    possibly in dictionaries, lists or tuples). Memory-mapped arrays are not
+    counted."""
+    if isinstance(data, np.ndarray):
+        base = data
+        while isinstance(base, np.ndarray) and not isinstance(base, np.memmap):
+            base = base.base
+        return 0 if isinstance(base, np.memmap) else data.nbytes
+    if isinstance(data, dict):
+        return sum(data_nbytes(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return sum(data_nbytes(value) for value in data)
+    return 0
+
+
+class SpillingPredictionStore(PredictionStore):
+    """A prediction store that keeps the arrays it holds in memory within a
+    memory budget.
+
+    When the stored arrays exceed `memory_budget` (in bytes), the least
+    recently stored or retrieved entries are saved to .npy files in
+    `spill_dir` and replaced by memory-mapped (copy-on-write) versions of
+    themselves, of the same type and with the same attributes (e.g. units),
+    so that retrieving them works as before.
+
+    If no `spill_dir` is given, the store makes a temporary one, and removes
+    it (with the spill files) when the store is closed, garbage collected or
+    the interpreter exits.  The store can also be used as a context manager.
+    """
+
+    def __init__(self, memory_budget, spill_dir=None):
+        super(SpillingPredictionStore, self).__init__()
+        self.memory_budget = memory_budget
+        self._cleanup = None
+        if spill_dir is None:
+            spill_dir = tempfile.mkdtemp(prefix='sciunit_spill_')
+            if hasattr(weakref, 'finalize'):
+                self._cleanup = weakref.finalize(self, shutil.rmtree,
+                                                 spill_dir, True)
+            else:  # Python 2
+                atexit.register(shutil.rmtree, spill_dir, True)
+        elif not os.path.isdir(spill_dir):
+            os.makedirs(spill_dir)
+        self.spill_dir = spill_dir
+        self.memory_used = 0
+        self._sizes = OrderedDict()  # key -> nbytes, least recent first
+        self._paths = {}  # key -> paths of spilled arrays
+
+    memory_budget = None
+    """The maximum number of bytes of arrays to hold in memory."""
+
+    spill_dir = None
+    """The directory to which arrays are spilled."""
+
+    def put(self, data):
+        """Store `data` and return its key, spilling the least recently used
+        data to disk if the memory budget is exceeded."""
+        new = self._key(data) is None
+        key = super(SpillingPredictionStore, self).put(data)
+        if new:
+            size = data_nbytes(data)
+            if size:
+                self._sizes[key] = size
+                self.memory_used += size
+                self.enforce_budget()
+        else:
+            self._touch(key)
+        return key
+
+    def get(self, key):
+        """Return the data stored under `key` (memory-mapped if spilled)."""
+        self._touch(key)
+        return super(SpillingPredictionStore, self).get(key)
+
+    def discard(self, key):
+        """Remove the data stored under `key`, if any, and its spill
+        files."""
+        self.memory_used -= self._sizes.pop(key, 0)
+        for path in self._paths.pop(key, []):
+            if os.path.exists(path):
+                os.remove(path)
+        super(SpillingPredictionStore, self).discard(key)
+
+    def clear(self):
+        """Remove all of the stored data and spill files."""
+        for key in list(self._data):
+            self.discard(key)
+
+    def close(self):
+        """Remove all of the stored data and spill files, and the spill
+        directory if the store made it."""
+        self.clear()
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def __getstate__(self):
+        state = super(SpillingPredictionStore, self).__getstate__()
+        state['_cleanup'] = None  # Only the original removes the directory.
+        return state
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def enforce_budget(self):
+        """Spill the least recently used data until the arrays held in
+        memory fit within the memory budget."""
+        while self.memory_used > self.memory_budget and self._sizes:
+            key, size = self._sizes.popitem(last=False)
+            self.memory_used -= size
+            self.spill(key)
+
+    def spill(self, key):
+        """Spill the arrays stored under `key` to disk."""
+        data = self._data[key]
+        self._keys.pop(id(data), None)
+        paths = self._paths.setdefault(key, [])
+        self._data[key] = self._spill(data, key, paths)
+        self._keys[id(self._data[key])] = key
+
+    def _spill(self, data, key, paths):
+        """Return a copy of `data` with its arrays replaced by memory-mapped
+        versions of themselves."""
+        if isinstance(data, np.ndarray):
+            if data.dtype.hasobject or not data_nbytes(data):
+                return data
+            path = os.path.join(self.spill_dir,
+                                '%d_%d.npy' % (key, len(paths)))
+            np.save(path, np.asarray(data))
+            paths.append(path)
+            spilled = np.load(path, mmap_mode='c').view(type(data))
+            if hasattr(data, '__dict__'):
+                spilled.__dict__.update(data.__dict__)  # E.g. units.
+            return spilled
+        if isinstance(data, dict):
+            spilled = data.copy()  # Keep the type of dictionary.
+            for name, value in data.items():
+                spilled[name] = self._spill(value, key, paths)
+            return spilled
+        if isinstance(data, (list, tuple)):
+            return type(data)(self._spill(value, key, paths)
+                              for value in data)
+        return data
+
+    def _touch(self, key):
+        """Mark the data stored under `key` as the most recently used."""
+        if key in self._sizes:
+            self._sizes[key] = self._sizes.pop(key)
@@ -2,27 +2,53 @@
 Base class for SciUnit test suites.
 """
 
+import bisect
 import random
+import traceback
+try:
+    from collections.abc import Sequence
+except ImportError:  # Python 2
+    from collections import Sequence
+
+import numpy as np
 
 from .base import SciUnit, TestWeighted
-from .utils import log
+from .utils import log, iter_table_chunks
 from .tests import Test
 from .models import Model
-from .scores import NoneScore
+from .capabilities import CapabilityIndex
+from .stores import SpillingPredictionStore
+from .scores import NoneScore, NAScore, ErrorScore, TBDScore, ScoreBlock
 from .scores.collections import ScoreMatrix
+from .errors import Error, ObservationError, CapabilityError
 
 
 class TestSuite(SciUnit, TestWeighted):
     """A collection of tests."""
 
     def __init__(self, tests, name=None, weights=None, include_models=None,
-                 skip_models=None, hooks=None):
+                 skip_models=None, hooks=None, score_binding=None,
+                 prediction_store=None, memory_budget=None, spill_dir=None):
         self.name = name if name else "Suite_%d" % random.randint(0, 1e12)
+        if isinstance(tests, (Test, TestFamily)):
+            tests = [tests]
+        elif not isinstance(tests, (TestTable, list, tuple)):
+            try:
+                tests = list(tests)  # E.g. a generator, consumed only once.
+            except TypeError:
+                pass  # Rejected by `assert_tests`.
+        self.families = [x for x in tests if isinstance(x, TestFamily)] \
+            if isinstance(tests, (list, tuple)) else []
         self.tests = self.assert_tests(tests)
         self.weights_ = [] if not weights else list(weights)
         self.include_models = include_models if include_models else []
         self.skip_models = skip_models if skip_models else []
         self.hooks = hooks
+        self.score_binding = score_binding
+        if prediction_store is None and memory_budget is not None:
+            prediction_store = SpillingPredictionStore(memory_budget,
+                                                       spill_dir=spill_dir)
+        self.prediction_store = prediction_store
         super(TestSuite, self).__init__()
 
     name = None
@@ -34,6 +60,22 @@ class TestSuite(SciUnit, TestWeighted):
     tests = None
     """The sequence of tests that this suite contains."""
 
+    families = None
+    """The test families in this suite. Their member tests are included in
+    `tests`, and each family is judged as one group of columns."""
+
+    score_binding = None
+    """The score binding ('full', 'summary' or 'none') to use for every test
+    in the suite (see `Test.score_binding`), or None to use each test's
+    own."""
+
+    prediction_store = None
+    """A prediction store to use for every test in the suite, or None to
+    use each test's own.  If the suite is given a `memory_budget` (in bytes)
+    instead, this is a `SpillingPredictionStore`, which spills predictions
+    and related data beyond the budget to `spill_dir` (by default a new
+    temporary directory)."""
+
     include_models = []
     """List of names or instances of models to judge
     (all passed to judge are judged by default)."""
@@ -45,9 +87,20 @@ class TestSuite(SciUnit, TestWeighted):
     def assert_tests(self, tests):
         """Check and in some cases fixes the list of tests."""
 
+        if isinstance(tests, TestTable):
+            # Only contains tests, which are instantiated when needed.
+            return tests
         if isinstance(tests, Test):
             # Turn singleton test into a sequence
             tests = (tests,)
+        elif isinstance(tests, TestFamily):
+            tests = tests.tests
+        elif isinstance(tests, (list, tuple)) and \
+                any(isinstance(x, TestFamily) for x in tests):
+            # Replace each test family with its member tests
+            tests = self.assert_tests(
+                [test for x in tests for test in
+                 (x.tests if isinstance(x, TestFamily) else [x])])
         else:
             try:
                 for test in tests:
@@ -85,12 +138,30 @@ class TestSuite(SciUnit, TestWeighted):
         indicates that it cannot.
         """
         models = self.assert_models(models)
-        sm = ScoreMatrix(self.tests, models)
-        for test in self.tests:
-            for model in models:
-                sm.loc[model, test] = test.check(model,
-                                                 require_extra=require_extra)
-        return sm
+        index = CapabilityIndex(models, require_extra=require_extra)
+        scores = [[None for test in self.tests] for model in models]
+        for j, test in enumerate(self.tests):
+            if not index.covers(test):
+                for i, model in enumerate(models):
+                    scores[i][j] = test.check(model,
+                                              require_extra=require_extra,
+                                              stop_on_error=stop_on_error)
+                continue
+            try:
+                eligible = index.eligible(test)
+            except Exception:
+                if stop_on_error:
+                    raise
+                # Check each model separately to find the one(s) in error.
+                for i, model in enumerate(models):
+                    scores[i][j] = test.check(model,
+                                              require_extra=require_extra,
+                                              stop_on_error=False)
+                continue
+            for i in range(len(models)):
+                scores[i][j] = TBDScore.interned() if i in eligible \
+                    else NAScore.interned()
+        return ScoreMatrix(self.tests, models, scores=scores)
 
     def check_capabilities(self, model, skip_incapable=False,
                            require_extra=False):
@@ -100,12 +171,25 @@ class TestSuite(SciUnit, TestWeighted):
         corresponding to whether the test's required capabilities are satisfied
         by the model.
         """
-        return [test.check_capabilities(model,
-                skip_incapable=skip_incapable, require_extra=require_extra)
-                for test in self.tests]
+        if not isinstance(model, Model):
+            raise Error("Model %s is not a sciunit.Model." % str(model))
+        index = CapabilityIndex([model], require_extra=require_extra)
+        result = []
+        for test in self.tests:
+            if not index.covers(test):
+                result.append(test.check_capabilities(
+                    model, skip_incapable=skip_incapable,
+                    require_extra=require_extra))
+                continue
+            capable = 0 in index.eligible(test)
+            if not capable and not skip_incapable:
+                raise CapabilityError(model, index.missing(0, test))
+            result.append(capable)
+        return result
 
     def judge(self, models,
-              skip_incapable=False, stop_on_error=True, deep_error=False):
+              skip_incapable=False, stop_on_error=True, deep_error=False,
+              bootstrap=None, confidence=0.95, random_state=None):
         """Judge the provided models against each test in the test suite.
 
         Args:
@@ -116,16 +200,34 @@ class TestSuite(SciUnit, TestWeighted):
                 is encountered or just produce an ErrorScore.
             deep_error (bool): Whether the error message should penetrate
                 all the way to the root of the error.
+            bootstrap (int, optional): A number of bootstrap resamples with
+                which to attach a confidence interval to each score (see
+                `Test.judge`).  The tests of families are then judged one
+                at a time.
+            confidence (float): The confidence level of the intervals.
+            random_state (optional): A seed for the resampling.
 
         Returns:
             ScoreMatrix: The resulting scores for all test/model combos.
         """
         models = self.assert_models(models)
         sm = ScoreMatrix(self.tests, models, weights=self.weights)
+        kwargs = {'bootstrap': bootstrap, 'confidence': confidence,
+                  'random_state': random_state} if bootstrap else {}
+        families = [] if bootstrap else self.families
+        family_tests = set(test for family in families
+                           for test in family.tests)
         for model in models:
+            for family in families:
+                scores = self.judge_family(model, family, sm, skip_incapable,
+                                           stop_on_error, deep_error)
+                for test, score in zip(family.tests, scores):
+                    self.set_hooks(test, score)
             for test in self.tests:
+                if test in family_tests:
+                    continue
                 score = self.judge_one(model, test, sm, skip_incapable,
-                                       stop_on_error, deep_error)
+                                       stop_on_error, deep_error, **kwargs)
                 self.set_hooks(test, score)
         return sm
 
@@ -140,21 +242,82 @@ class TestSuite(SciUnit, TestWeighted):
         return skip
 
     def judge_one(self, model, test, sm,
-                  skip_incapable=True, stop_on_error=True, deep_error=False):
-        """Judge model and put score in the ScoreMatrix."""
+                  skip_incapable=True, stop_on_error=True, deep_error=False,
+                  **kwargs):
+        """Judge model and put score in the ScoreMatrix.
+
+        Any other keyword arguments (e.g. `bootstrap`) are passed to
+        `test.judge`."""
         if self.is_skipped(model):
-            score = NoneScore(None)
+            score = NoneScore(None)  # Not shared, as hooks get it.
         else:
             log('Executing test <i>%s</i> on model <i>%s</i>' % (test, model),
                 end=u"... ")
-            score = test.judge(model, skip_incapable=skip_incapable,
-                               stop_on_error=stop_on_error,
-                               deep_error=deep_error)
+            previous = self.set_score_binding([test])
+            try:
+                score = test.judge(model, skip_incapable=skip_incapable,
+                                   stop_on_error=stop_on_error,
+                                   deep_error=deep_error, **kwargs)
+            finally:
+                self.restore_score_binding(previous)
             log('Score is <a style="color: rgb(%d,%d,%d)">' % score.color()
                 + '%s</a>' % score)
         sm.loc[model, test] = score
         return score
 
+    def set_score_binding(self, tests):
+        """Apply the suite's score binding and prediction store (if any) to
+        the tests, while they are judged by the suite.
+
+        Returns the tests' own overrides, to be put back afterwards with
+        `restore_score_binding`.
+        """
+        overrides = {'score_binding': self.score_binding,
+                    'prediction_store': self.prediction_store}
+        overrides = {name: value for name, value in overrides.items()
+                    if value is not None}
+        previous = []
+        for test in tests:
+            previous.append((test, {name: test.__dict__[name]
+                                    for name in overrides
+                                    if name in test.__dict__},
+                             list(overrides)))
+            for name, value in overrides.items():
+                setattr(test, name, value)
+        return previous
+
+    def restore_score_binding(self, previous):
+        """Put back the tests' own score bindings and prediction stores,
+        as returned by `set_score_binding`."""
+        for test, own, names in reversed(previous):
+            for name in names:
+                if name in own:
+                    setattr(test, name, own[name])
+                else:  # The test used its class's setting.
+                    test.__dict__.pop(name, None)
+
+    def judge_family(self, model, family, sm,
+                     skip_incapable=True, stop_on_error=True,
+                     deep_error=False):
+        """Judge model on a test family and put its scores in the
+        ScoreMatrix."""
+        if self.is_skipped(model):
+            scores = [NoneScore(None) for test in family.tests]
+        else:
+            log('Executing test family <i>%s</i> on model <i>%s</i>'
+                % (family, model))
+            previous = self.set_score_binding(family.tests)
+            try:
+                scores = family.judge_model(model,
+                                            skip_incapable=skip_incapable,
+                                            stop_on_error=stop_on_error,
+                                            deep_error=deep_error)
+            finally:
+                self.restore_score_binding(previous)
+        for test, score in zip(family.tests, scores):
+            sm.loc[model, test] = score
+        return scores
+
     def optimize(self, model):
         """Optimize model parameters to get the best Test Suite scores."""
         raise NotImplementedError(("Optimization not implemented "
@@ -195,6 +358,365 @@ class TestSuite(SciUnit, TestWeighted):
             tests.append(test)
         return cls(tests, name=name)
 
+    @classmethod
+    def from_table(cls, source, test_class, units=None, class_column=None,
+                   name_column=None, columns=None, chunksize=10000,
+                   validate=True, name=None, file_format=None):
+        """Instantiate a test suite from a table of observations.
+
+        Each row of the table is the observation for one test, keyed by
+        column name (e.g. 'mean', 'std', 'n'); missing (NaN or None) values
+        are left out of the observation. The table is read `chunksize` rows
+        at a time and each chunk is validated per test class in one pass.
+        Observations are stored column-wise and each `Test` is only
+        instantiated when it is first needed.
+
+        `source` can be the path to a CSV, Parquet or NPZ file, a pandas
+        DataFrame or a dictionary of arrays (see `utils.iter_table_chunks`).
+        `test_class` is the test class for every row, or a dictionary
+        mapping the values of column `class_column` to test classes.
+        `units` optionally maps column names to the units for their values,
+        e.g. {'mean': pq.mV, 'std': pq.mV}. Test names can be taken from
+        column `name_column`. For large tables, validation is much faster
+        with settings['VALIDATION_BACKEND'] = 'native'.
+        """
+        if isinstance(test_class, dict):
+            assert class_column is not None, \
+                "A `class_column` is needed to choose among test classes"
+            labels = list(test_class)
+            test_classes = [test_class[label] for label in labels]
+            positions = {label: i for i, label in enumerate(labels)}
+        else:
+            labels = None
+            test_classes = [test_class]
+        for test_class_ in test_classes:
+            assert Test.is_test_class(test_class_), \
+                "Test classes must be subclasses of sciunit.Test"
+
+        table = TestTable(test_classes, units=units)
+        special = [x for x in (class_column, name_column) if x is not None]
+        for chunk in iter_table_chunks(source, chunksize=chunksize,
+                                       file_format=file_format,
+                                       columns=(list(columns) + special)
+                                       if columns else None):
+            if labels is None:
+                class_indices = None
+            else:
+                try:
+                    class_indices = np.array([positions[label] for label
+                                              in chunk.pop(class_column)])
+                except KeyError as e:
+                    raise Error("No test class for value %s of column '%s'"
+                                % (e, class_column))
+            names = chunk.pop(name_column) if name_column else None
+            table.append_columns(chunk, class_indices=class_indices,
+                                 names=names)
+            if validate:
+                table.validate_block(-1)
+        return cls(table, name=name)
+
     def __str__(self):
         """Represent the TestSuite instance as a string."""
         return '%s' % self.name
+
+
+class TestTable(Sequence):
+    """A sequence of tests whose observations are stored as table columns.
+
+    Tests are instantiated (and cached) only when first accessed, so that a
+    suite can hold a very large number of tests without building every
+    `Test`, or every observation dictionary, up front.
+    """
+
+    def __init__(self, test_classes, units=None, params=None):
+        self.test_classes = list(test_classes)
+        self.units = units if units else {}
+        self.params = params if params else {}
+        self._blocks = []  # (columns, class_indices, names) for each chunk.
+        self._offsets = [0]  # First row of each block, and the total.
+        self._tests = {}
+        self._prototypes = {}  # A test of each class, used for validation.
+
+    def append_columns(self, columns, class_indices=None, names=None):
+        """Append rows given as a dictionary of equal-length column arrays.
+
+        `class_indices` gives the position in `test_classes` of the test
+        class for each row (default: the first test class), and `names`
+        the name of the test for each row.
+        """
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        if class_indices is None:
+            class_indices = np.zeros(n_rows, dtype=int)
+        self._blocks.append((columns, np.asarray(class_indices), names))
+        self._offsets.append(self._offsets[-1] + n_rows)
+
+    def _locate(self, i):
+        """Return the block containing row `i` and the row within it."""
+        b = bisect.bisect_right(self._offsets, i) - 1
+        return self._blocks[b], i - self._offsets[b]
+
+    def observation(self, i):
+        """Return the observation dictionary for row `i`."""
+        (columns, _, _), j = self._locate(i)
+        observation = {}
+        for key, values in columns.items():
+            value = values[j]
+            if hasattr(value, 'item'):
+                value = value.item()  # Numpy scalar to Python scalar.
+            if value is None or (isinstance(value, float) and
+                                 value != value):  # Missing or NaN.
+                continue
+            if key in self.units:
+                value = value * self.units[key]
+            observation[key] = value
+        return observation
+
+    def test_class(self, i):
+        """Return the test class for row `i`."""
+        (_, class_indices, _), j = self._locate(i)
+        return self.test_classes[class_indices[j]]
+
+    def test_name(self, i):
+        """Return the test name for row `i` (None for the default)."""
+        (_, _, names), j = self._locate(i)
+        if names is None or names[j] is None:
+            return None
+        return str(names[j])
+
+    def validate_block(self, b):
+        """Validate the observations in block `b` (e.g. the chunk that was
+        last appended) in one pass per test class.
+
+        The observations of each class are validated by one prototype test
+        of that class, unless validation may depend on the instance (see
+        `shares_validation`), in which case each row is validated by its
+        own test.
+
+        Raises an ObservationError listing the errors for each invalid row.
+        """
+        b %= len(self._blocks)
+        _, class_indices, _ = self._blocks[b]
+        rows = np.arange(len(class_indices)) + self._offsets[b]
+        errors = {}
+        for index, test_class in enumerate(self.test_classes):
+            class_rows = rows[class_indices == index]
+            if not len(class_rows):
+                continue
+            if index not in self._prototypes:
+                self._prototypes[index] = self[int(class_rows[0])]
+            prototype = self._prototypes[index]
+            if self.shares_validation(prototype):
+                observations = (self.observation(i) for i in class_rows)
+                class_errors = prototype.validate_observations(observations)
+            else:
+                class_errors = {}
+                for j, i in enumerate(class_rows):
+                    test = self[int(i)]
+                    row_errors = test.validate_observations(
+                        [test.observation])
+                    if row_errors:
+                        class_errors[j] = row_errors[0]
+            errors.update({int(class_rows[j]): error
+                           for j, error in class_errors.items()})
+        if errors:
+            raise ObservationError(dict(sorted(errors.items())))
+
+    @classmethod
+    def shares_validation(cls, prototype):
+        """Whether the validation of observations by `prototype` applies to
+        every test of its class, i.e. whether its class keeps
+        `Test.__init__` and it has the class's observation schema and
+        units."""
+        test_class = prototype.__class__
+        init = getattr(test_class.__init__, '__func__', test_class.__init__)
+        if init is not getattr(Test.__init__, '__func__', Test.__init__):
+            return False
+        return not set(('observation_schema', 'units')).intersection(
+            prototype.__dict__)
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Test table index out of range")
+        if i not in self._tests:
+            test_class = self.test_class(i)
+            self._tests[i] = test_class(self.observation(i),
+                                        name=self.test_name(i),
+                                        **self.params)
+        return self._tests[i]
+
+
+class TestFamily(SciUnit):
+    """One test definition applied to many observations.
+
+    Holds the observations for a single test class as a numpy structured
+    array (one field per observation key). When judging a model, the
+    prediction is generated once and all of the scores are computed with
+    one call to the score type's `compute_many`. Scores are reported
+    against one member test per observation, which (like those of a
+    `TestTable`) are only instantiated when needed.
+    """
+
+    def __init__(self, test_class, observations, units=None, names=None,
+                 name=None, validate=True, **params):
+        """
+        Args:
+            test_class (type): The Test subclass to apply.
+            observations: A structured array, a DataFrame or a dictionary
+                of equal-length arrays, with one row per observation.
+            units (dict, optional): Units for observation fields, e.g.
+                {'mean': pq.mV, 'std': pq.mV}.
+            names (list, optional): A name for each member test.
+            name (str, optional): The name of the family.
+            validate (bool): Whether to validate all of the observations
+                (in one pass) now.
+            params: Parameters for every member test.
+        """
+        assert Test.is_test_class(test_class), \
+            "A test family requires a subclass of sciunit.Test"
+        self.test_class = test_class
+        self.name = name if name else "%s_family" % test_class.__name__
+        self.observations = self.structure_observations(observations)
+        self.units = units if units else {}
+        self.params = params
+        self.tests = TestTable([test_class], units=self.units, params=params)
+        fields = self.observations.dtype.names
+        self.tests.append_columns({key: self.observations[key]
+                                   for key in fields}, names=names)
+        if validate and len(self.tests):
+            self.tests.validate_block(0)
+        super(TestFamily, self).__init__()
+
+    test_class = None
+    """The Test subclass applied to every observation."""
+
+    observations = None
+    """A structured array with one row per observation."""
+
+    tests = None
+    """A sequence of member tests, one per observation."""
+
+    @classmethod
+    def structure_observations(cls, observations):
+        """Convert a DataFrame or dictionary of arrays into a structured
+        array."""
+        if isinstance(observations, np.ndarray) and \
+           observations.dtype.names:
+            return observations
+        if hasattr(observations, 'to_records'):  # A pandas DataFrame
+            return observations.to_records(index=False)
+        keys = list(observations)
+        return np.rec.fromarrays([np.asarray(observations[key])
+                                  for key in keys], names=keys)
+
+    @property
+    def observation_columns(self):
+        """A dictionary of observation arrays, with units if they have
+        them."""
+        columns = {}
+        for key in self.observations.dtype.names:
+            column = np.asarray(self.observations[key])
+            if key in self.units:
+                column = column * self.units[key]
+            columns[key] = column
+        return columns
+
+    @property
+    def prototype(self):
+        """The first member test, used to check models and make
+        predictions."""
+        return self.tests[0]
+
+    def compute_scores(self, prediction):
+        """Compute a score for every observation from one prediction.
+
+        Uses the score type's `compute_many` if the test class does not
+        override `compute_score`, and otherwise each member test's
+        `compute_score`.
+        """
+        compute_score = getattr(self.test_class.compute_score, '__func__',
+                                self.test_class.compute_score)
+        if compute_score is getattr(Test.compute_score, '__func__',
+                                    Test.compute_score):
+            score_type = self.prototype.score_type
+            return score_type.compute_many(self.observation_columns,
+                                           prediction)
+        return [test.compute_score(test.observation, prediction)
+                for test in self.tests]
+
+    def _judge_model(self, model, skip_incapable=True):
+        """Generate scores for the model (internal API use only)."""
+        prototype = self.prototype
+        prototype.check_capabilities(model, skip_incapable=skip_incapable)
+        prediction = prototype.reduce_prediction(
+            prototype.generate_prediction(model))
+        prototype.check_prediction(prediction)
+        scores = self.compute_scores(prediction)
+        converter = prototype.converter
+        converted = converter is not None and \
+            isinstance(scores, ScoreBlock) and \
+            all(test.converter is converter for test in self.tests)
+        if converted:  # Convert all of the scores at once.
+            scores = converter.convert_many(scores)
+        scores = list(scores)
+        for i, test in enumerate(self.tests):
+            score = scores[i]
+            if test.converter and not converted:
+                score = test.converter.convert(score)
+            test.check_score_type(score)
+            test._bind_score(score, model, test.observation, prediction)
+            scores[i] = score
+        return scores
+
+    def judge_model(self, model, skip_incapable=False, stop_on_error=True,
+                    deep_error=False):
+        """Generate one score per observation for the provided model.
+
+        Follows the same steps and error handling as `Test.judge`, but
+        generates the prediction only once.
+        """
+        if deep_error:
+            scores = self._judge_model(model, skip_incapable=skip_incapable)
+        else:
+            try:
+                scores = self._judge_model(model,
+                                           skip_incapable=skip_incapable)
+            except CapabilityError as e:
+                scores = [NAScore(str(e)) for test in self.tests]
+            except Exception as e:
+                e.stack = traceback.format_exc()
+                scores = [ErrorScore(e) for test in self.tests]
+            for test, score in zip(self.tests, scores):
+                score.model = model
+                score.test = test
+        if scores and isinstance(scores[0], ErrorScore) and stop_on_error:
+            raise scores[0].score  # An exception.
+        return scores
+
+    def judge(self, models, skip_incapable=False, stop_on_error=True,
+              deep_error=False, bootstrap=None, confidence=0.95,
+              random_state=None):
+        """Judge the provided models on every observation in the family
+        (see `TestSuite.judge`).
+
+        Returns:
+            ScoreMatrix: One column per member test.
+        """
+        suite = TestSuite([self], name=self.name)
+        return suite.judge(models, skip_incapable=skip_incapable,
+                           stop_on_error=stop_on_error, deep_error=deep_error,
+                           bootstrap=bootstrap, confidence=confidence,
+                           random_state=random_state)
+
+    def __len__(self):
+        return len(self.tests)
+
+    def __str__(self):
+        """Represent the TestFamily instance as a string."""
+        return '%s' % self.name
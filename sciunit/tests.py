@@ -1,19 +1,43 @@
 """SciUnit tests live in this module."""
 
+import os
+import atexit
 import inspect
+import pickle
+import hashlib
+import weakref
+import tempfile
 import traceback
+from copy import copy
+try:
+    from collections.abc import Iterator
+except ImportError:  # Python 2
+    from collections import Iterator
+
+import numpy as np
 
 from sciunit import settings
 from sciunit.base import SciUnit
 from .capabilities import ProducesNumber
 from .models import Model
+from .stores import summarize, data_nbytes
+from .utils import canonical
 from .scores import Score, BooleanScore, NoneScore, ErrorScore, TBDScore,\
                     NAScore
-from .validators import ObservationValidator, ParametersValidator
+from .validators import ObservationValidator, ParametersValidator,\
+                        get_validator
 from .errors import Error, CapabilityError, ObservationError,\
                     InvalidScoreError, ParametersError
 
 
+def _remove_file(path):
+    """Remove the file at `path`, if it still exists."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 class Test(SciUnit):
     """Abstract base class for tests."""
 
@@ -35,6 +59,8 @@ class Test(SciUnit):
         #self.params.update(params)
         self.validate_params(self.params)
 
+        if self.normalize_units:
+            observation = self.normalize_observation(observation)
         self.observation = observation
         if settings['PREVALIDATE']:
             self.validate_observation(self.observation)
@@ -69,15 +95,46 @@ class Test(SciUnit):
     If it is a list, each schema in the list can optionally be named by putting
     (name, schema) tuples in that list."""
 
+    normalize_units = False
+    """Whether to convert the quantities in the observation to their
+    simplified (SI) units at construction.  Predictions are then converted
+    to those units by the score types with cached factors, and scores with
+    units (e.g. error metrics) are expressed in them."""
+
     params_schema = None
     """A schema that the params must adhere to (validated by cerberus).
     Can also be a list of schemas, one of which the params must match."""
 
+    def normalize_observation(self, observation):
+        """Return the observation with each of its quantities (or itself, if
+        it is one) converted to simplified (SI) units."""
+        if isinstance(observation, dict):
+            return {key: canonical(value)
+                    for key, value in observation.items()}
+        return canonical(observation)
+
     def validate_observation(self, observation):
         """Validate the observation provided to the constructor.
 
         Raises an ObservationError if invalid.
         """
+        fingerprint = None
+        if self.observation_schema:
+            fingerprint = self.observation_fingerprint(observation)
+            if fingerprint is not None and \
+               fingerprint in self._validated_observations:
+                return observation
+        self._validate_observation(observation)
+        if fingerprint is not None:
+            # Keep identity-keyed observations (and their values) alive, so
+            # that their ids are not reused by other objects.
+            refs = (observation, list(observation.values())) \
+                if isinstance(fingerprint, tuple) else None
+            self._validated_observations[fingerprint] = refs
+        return observation
+
+    def _validate_observation(self, observation):
+        """Validate an observation without consulting the validation memo."""
         if not observation:
             raise ObservationError("Observation is missing.")
         if not isinstance(observation, dict):
@@ -94,10 +151,72 @@ class Test(SciUnit):
                 schema = {'schema': self.observation_schema,
                           'type': 'dict'}
             schema = {'observation': schema}
-            v = ObservationValidator(schema, test=self)
+            v = get_validator(ObservationValidator, schema, self)
             if not v.validate({'observation': observation}):
                 raise ObservationError(v.errors)
-        return observation
+
+    def validate_observations(self, observations):
+        """Validate many observations (e.g. the rows of a table) in one pass.
+
+        Each observation is validated as if it had been provided to a test of
+        this class. Returns a dictionary mapping the position of each invalid
+        observation to its errors.
+        """
+        validate = self.validate_observation
+        method = getattr(validate, '__func__', validate)
+        if method is getattr(Test.validate_observation, '__func__',
+                             Test.validate_observation):
+            # Skip the memo; these observations are validated only once.
+            validate = self._validate_observation
+        errors = {}
+        for i, observation in enumerate(observations):
+            try:
+                validate(observation)
+            except ObservationError as e:
+                errors[i] = e.args[0]
+        return errors
+
+    @property
+    def _validated_observations(self):
+        """Fingerprints of observations that have already passed validation
+        (see `observation_fingerprint`).
+
+        Lets `_judge` skip revalidating an unchanged observation on every
+        model.
+        """
+        if '_validation_memo' not in self.__dict__:
+            self._validation_memo = {}
+        return self._validation_memo
+
+    fingerprint_max_bytes = 2**16
+    """The size of the arrays in an observation above which it is
+    fingerprinted by identity rather than by its contents."""
+
+    @classmethod
+    def observation_fingerprint(cls, observation):
+        """Return a key for the observation's contents.
+
+        Small observations are keyed by a hash of their contents.  Those
+        with more than `fingerprint_max_bytes` of arrays, which would cost
+        about as much to hash as to validate, are keyed by the identities of
+        the observation and its values, so replacing a value is noticed but
+        modifying an array in place is not.  Returns None if the observation
+        is not a dictionary or cannot be pickled, in which case it will be
+        revalidated every time.
+        """
+        if not isinstance(observation, dict):
+            return None
+        nbytes = sum(getattr(value, 'nbytes', 0)
+                     for value in observation.values())
+        if nbytes > cls.fingerprint_max_bytes:
+            return (id(observation),) + tuple(
+                (key, id(observation[key])) for key in sorted(observation))
+        try:
+            items = [(key, observation[key]) for key in sorted(observation)]
+            s = pickle.dumps(items)
+        except Exception:
+            return None
+        return hashlib.sha224(s).hexdigest()
 
     @classmethod
     def observation_schema_names(cls):
@@ -126,7 +245,7 @@ class Test(SciUnit):
                 schema = {'schema': self.params_schema,
                           'type': 'dict'}
             schema = {'params': schema}
-            v = ParametersValidator(schema, test=self)
+            v = get_validator(ParametersValidator, schema, self)
             if not v.validate({'params': params}):
                 raise ParametersError(v.errors)
         return params
@@ -178,6 +297,16 @@ class Test(SciUnit):
         raise NotImplementedError(("Test %s does not implement "
                                    "generate_prediction.") % str())
 
+    def reduce_prediction(self, prediction):
+        """If the prediction is a stream of chunks (an iterator, e.g. from a
+        generator), reduce it to what the score type needs, as the chunks
+        arrive (see `Score.reduce_stream`).  Other predictions are returned
+        as they are.
+        """
+        if isinstance(prediction, Iterator):
+            prediction = self.score_type.reduce_stream(prediction)
+        return prediction
+
     def check_prediction(self, prediction):
         """Check the prediction for acceptable values.
 
@@ -202,14 +331,43 @@ class Test(SciUnit):
         score = self.score_type.compute(observation, prediction)
         return score
 
+    score_binding = None
+    """How much of each judgement to bind to its score: 'full' binds the
+    prediction and the observation; 'summary' binds only a summary of the
+    prediction; and 'none' binds neither.  Defaults to
+    settings['SCORE_BINDING'].  With 'full' or 'summary', if the test has a
+    `prediction_store` the prediction is kept there instead of on the score
+    (along with any arrays in the score's related_data), and retrieved from
+    it on access."""
+
+    prediction_store = None
+    """A `sciunit.stores.PredictionStore` for predictions (and related data)
+    that are not bound directly to their scores."""
+
     def _bind_score(self, score, model, observation, prediction):
         """Bind some useful attributes to the score."""
         score.model = model
         score.test = self
-        score.prediction = prediction
-        score.observation = observation
         # Don't let scores share related_data.
-        score.related_data = score.related_data.copy()
+        if 'related_data' in score.__dict__:
+            score.related_data = score.related_data.copy()
+        binding = self.score_binding or settings['SCORE_BINDING']
+        if binding not in ('full', 'summary', 'none'):
+            raise Error("Unknown score binding '%s'." % binding)
+        store = self.prediction_store if binding != 'none' else None
+        if binding == 'summary':
+            score.prediction_summary = summarize(prediction)
+        if store is not None:
+            score.prediction_store = store
+            score.prediction_ref = store.bind(prediction, score)
+            if data_nbytes(score.__dict__.get('related_data')):
+                score.related_data_ref = store.bind(score.related_data,
+                                                    score)
+                del score.__dict__['related_data']
+        elif binding == 'full':
+            score.prediction = prediction
+        if binding == 'full' or observation is not self.observation:
+            score.observation = observation
         self.bind_score(score, model, observation, prediction)
 
     def bind_score(self, score, model, observation, prediction):
@@ -225,13 +383,14 @@ class Test(SciUnit):
                       score.__class__.__name__))
             raise InvalidScoreError(msg)
 
-    def _judge(self, model, skip_incapable=True):
+    def _judge(self, model, skip_incapable=True, bootstrap=None,
+               confidence=0.95, random_state=None):
         """Generate a score for the model (internal API use only)."""
         # 1.
         self.check_capabilities(model, skip_incapable=skip_incapable)
 
         # 2.
-        prediction = self.generate_prediction(model)
+        prediction = self.reduce_prediction(self.generate_prediction(model))
         self.check_prediction(prediction)
         self.last_model = model
 
@@ -251,11 +410,68 @@ class Test(SciUnit):
 
         # 5.
         self._bind_score(score, model, self.observation, prediction)
+        if bootstrap and not isinstance(score, (NoneScore, ErrorScore)):
+            self.bootstrap_score(score, self.observation, prediction,
+                                 bootstrap, confidence=confidence,
+                                 random_state=random_state)
+
+        return score
 
+    def compute_bootstrap(self, observation, prediction, n_resamples,
+                          random_state=None):
+        """Compute the score for each of `n_resamples` bootstrap resamples of
+        the observation and/or prediction samples, as a float array.
+
+        Uses the score type's vectorized `bootstrap` unless the test
+        overrides `compute_score`, in which case that is called for each
+        resample.
+        """
+        compute_score = getattr(self.__class__.compute_score, '__func__',
+                                self.__class__.compute_score)
+        if compute_score is getattr(Test.compute_score, '__func__',
+                                    Test.compute_score):
+            return self.score_type.bootstrap(observation, prediction,
+                                             n_resamples,
+                                             random_state=random_state)
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        resample = self.score_type.resample
+        observations = resample(observation, n_resamples, random_state)
+        predictions = resample(prediction, n_resamples, random_state)
+        if observations is observation and predictions is prediction:
+            raise Error(("Neither the observation nor the prediction has "
+                         "samples to resample."))
+        values = np.full(n_resamples, np.nan)
+        for i in range(n_resamples):
+            score = self.compute_score(
+                self.score_type._resampled(observations, observation, i),
+                self.score_type._resampled(predictions, prediction, i))
+            value = getattr(score.score, 'magnitude', score.score)
+            try:
+                values[i] = float(value)
+            except (TypeError, ValueError):  # E.g. a NoneScore.
+                pass
+        return values
+
+    def bootstrap_score(self, score, observation, prediction, n_resamples,
+                        confidence=0.95, random_state=None):
+        """Attach a percentile bootstrap confidence interval (from
+        `n_resamples` resamples) to `score`, as `score.ci`.
+
+        The interval is of the score's value as computed by `compute_score`,
+        i.e. before any converter is applied.
+        """
+        values = self.compute_bootstrap(observation, prediction, n_resamples,
+                                        random_state=random_state)
+        tail = 50.0*(1 - confidence)
+        low, high = np.nanpercentile(values, [tail, 100 - tail])
+        score.ci = (float(low), float(high))
+        score.ci_level = confidence
         return score
 
     def judge(self, model, skip_incapable=False, stop_on_error=True,
-              deep_error=False):
+              deep_error=False, bootstrap=None, confidence=0.95,
+              random_state=None):
         """Generate a score for the provided model (public method).
 
         Operates as follows:
@@ -277,7 +493,16 @@ class Test(SciUnit):
 
         If deep_error is true (not default), the traceback will contain the
         actual code execution error, instead of the content of an ErrorScore.
+
+        If bootstrap is a number N, the score (of each model) is also
+        computed for N bootstrap resamples of the samples of the observation
+        and/or the prediction (a 'samples' array, or an array of samples),
+        and the `confidence` percentile interval of those is attached to the
+        score as `score.ci` (see `bootstrap_score`).  `random_state` seeds
+        the resampling.
         """
+        kwargs = {'bootstrap': bootstrap, 'confidence': confidence,
+                  'random_state': random_state} if bootstrap else {}
         if isinstance(model, (list, tuple, set)):
             # If a collection of models is provided
             from .suites import TestSuite
@@ -285,13 +510,15 @@ class Test(SciUnit):
             # then test them using a one-test suite.
             return suite.judge(model, skip_incapable=skip_incapable,
                                stop_on_error=stop_on_error,
-                               deep_error=deep_error)
+                               deep_error=deep_error, **kwargs)
 
         if deep_error:
-            score = self._judge(model, skip_incapable=skip_incapable)
+            score = self._judge(model, skip_incapable=skip_incapable,
+                                **kwargs)
         else:
             try:
-                score = self._judge(model, skip_incapable=skip_incapable)
+                score = self._judge(model, skip_incapable=skip_incapable,
+                                    **kwargs)
             except CapabilityError as e:
                 score = NAScore(str(e))
                 score.model = model
@@ -347,7 +574,8 @@ class Test(SciUnit):
     @property
     def state(self):
         """Get the frozen (pickled) model state."""
-        return self._state(exclude=['last_model'])
+        return self._state(exclude=['last_model', '_validation_memo',
+                                    'prediction_store'])
 
     @classmethod
     def is_test_class(cls, other_cls):
@@ -399,6 +627,24 @@ class TestM2M(Test):
                                        "score_type with a compute method.")
                                       % self.name)
 
+    symmetric = False
+    """Whether the score of prediction1 against prediction2 is always the
+    same as that of prediction2 against prediction1.  If so, `judge` only
+    computes the scores on and above the diagonal of the score matrix, and
+    mirrors them below it."""
+
+    def compute_pairwise(self, predictions1, predictions2=None):
+        """Optionally compute the scores for many pairs of predictions at
+        once, e.g. as one numpy distance-matrix operation.
+
+        Returns a 2D array (or nested sequence) with one row per prediction
+        in `predictions1` and one column per prediction in `predictions2`
+        (or in `predictions1` again, if `predictions2` is None), of either
+        scores or raw values for `score_type`.  The default implementation
+        returns None, in which case `compute_score` is used for each pair.
+        """
+        return None
+
     def _bind_score(self, score, prediction1, prediction2, model1, model2):
         """Bind some useful attributes to the score."""
         score.model1 = model1
@@ -407,19 +653,35 @@ class TestM2M(Test):
         score.prediction1 = prediction1
         score.prediction2 = prediction2
         # Don't let scores share related_data.
-        score.related_data = score.related_data.copy()
+        if 'related_data' in score.__dict__:
+            score.related_data = score.related_data.copy()
         self.bind_score(score, prediction1, prediction2, model1, model2)
 
     def bind_score(self, score, prediction1, prediction2, model1, model2):
         """For the user to bind additional features to the score."""
         pass
 
-    def _judge(self, prediction1, prediction2, model1, model2=None):
+    def _judge(self, prediction1, prediction2, model1, model2=None,
+               score=None):
         # TODO: Not sure if below statement is required
         # self.last_model = model
 
         # 6.
-        score = self.compute_score(prediction1, prediction2)
+        if score is None:
+            score = self.compute_score(prediction1, prediction2)
+        score = self._finish_score(score)
+        # 8.
+        self._bind_score(score, prediction1, prediction2, model1, model2)
+
+        return score
+
+    def _finish_score(self, score):
+        """Make a score from a raw value (e.g. from `compute_pairwise`),
+        apply the converter (if any) and check the score type."""
+        if not isinstance(score, Score):  # A raw value from a kernel.
+            if isinstance(score, np.generic):
+                score = score.item()
+            score = self.score_type(score)
         if self.converter:
             score = self.converter.convert(score)
         # 7.
@@ -429,13 +691,108 @@ class TestM2M(Test):
                                      "was provided.")
                                     % (self.name, self.score_type.__name__,
                                        score.__class__.__name__))
-        # 8.
-        self._bind_score(score, prediction1, prediction2, model1, model2)
-
         return score
 
+    def _norm_score_block(self, predictions1, predictions2,
+                          stop_on_error=True):
+        """Return a float array of the norm scores of each prediction in
+        `predictions1` against each prediction in `predictions2`, without
+        keeping the scores themselves (NaN for scores without a norm
+        score, or for errors if not `stop_on_error`)."""
+        values = self.compute_pairwise(predictions1, predictions2)
+        block = np.empty((len(predictions1), len(predictions2)))
+        for i, prediction1 in enumerate(predictions1):
+            for j, prediction2 in enumerate(predictions2):
+                try:
+                    if values is None:
+                        score = self.compute_score(prediction1, prediction2)
+                    else:
+                        score = values[i][j]
+                    norm_score = self._finish_score(score).norm_score
+                except Exception:
+                    if stop_on_error:
+                        raise
+                    norm_score = None
+                block[i, j] = np.nan if norm_score is None else norm_score
+        return block
+
+    def _judge_blocked(self, predictions, block_size=None, out=None,
+                       k_nearest=None, stop_on_error=True):
+        """Compute the norm scores for all pairs of predictions, one
+        `block_size` x `block_size` tile at a time (internal API use only).
+
+        Without `k_nearest`, the norm scores are written to `out`: an array,
+        or the path of a .npy file to create and memory-map (by default, a
+        new temporary file, removed when the array is garbage collected),
+        which is returned.  With `k_nearest`, only the
+        k highest norm scores in each row (excluding the diagonal) are kept,
+        and the column indices and norm scores of each row's k nearest
+        neighbours are returned as two (n, k) arrays, in descending order of
+        norm score.
+        """
+        n = len(predictions)
+        block_size = block_size if block_size else max(n, 1)
+        blocks = [(start, min(start+block_size, n))
+                  for start in range(0, n, block_size)]
+        if k_nearest is None:
+            if out is None or isinstance(out, str):
+                temporary = out is None
+                if temporary:
+                    fd, out = tempfile.mkstemp(suffix='.npy',
+                                               prefix='sciunit_m2m_')
+                    os.close(fd)
+                path = out
+                out = np.lib.format.open_memmap(path, mode='w+',
+                                                dtype=np.float64,
+                                                shape=(n, n))
+                if temporary:
+                    # Remove the file once the array is no longer used.
+                    if hasattr(weakref, 'finalize'):
+                        weakref.finalize(out, _remove_file, path)
+                    else:  # Python 2
+                        atexit.register(_remove_file, path)
+            for a, b in blocks:
+                for c, d in blocks:
+                    if self.symmetric and c < a:
+                        out[a:b, c:d] = out[c:d, a:b].T
+                    else:
+                        out[a:b, c:d] = self._norm_score_block(
+                                predictions[a:b], predictions[c:d],
+                                stop_on_error=stop_on_error)
+            if isinstance(out, np.memmap):
+                out.flush()
+            return out
+        k = min(k_nearest, n-1)
+        indices = np.zeros((n, k), dtype=int)
+        values = np.zeros((n, k))
+        for a, b in blocks:
+            # One strip of rows at a time, against all columns.
+            strip = np.empty((b-a, n))
+            for c, d in blocks:
+                strip[:, c:d] = self._norm_score_block(
+                        predictions[a:b], predictions[c:d],
+                        stop_on_error=stop_on_error)
+            rows = np.arange(b-a)
+            strip[rows, rows+a] = -np.inf  # Not its own neighbour.
+            strip[np.isnan(strip)] = -np.inf
+            if k:
+                top = np.argpartition(-strip, k-1, axis=1)[:, :k]
+                order = np.argsort(-strip[rows[:, None], top], axis=1,
+                                   kind='mergesort')
+                top = top[rows[:, None], order]
+                indices[a:b] = top
+                values[a:b] = strip[rows[:, None], top]
+        values[np.isinf(values)] = np.nan
+        return indices, values
+
+    prediction_executor = None
+    """How `judge` generates the models' predictions: None (serially),
+    'thread' or 'process' (in parallel, on a pool of threads or
+    processes), or a `concurrent.futures.Executor` instance."""
+
     def judge(self, models, skip_incapable=False, stop_on_error=True,
-              deep_error=False):
+              deep_error=False, executor=None, max_workers=None,
+              block_size=None, out=None, k_nearest=None):
         """Generate a score matrix for the provided model(s).
 
         Operates as follows:
@@ -448,7 +805,9 @@ class TestM2M(Test):
         4. Calls generate_prediction to generate predictions for each model,
            and these are appeneded to the predictions list.
         5. Generate a 2D list as a placeholder for all the scores.
-        6. Calls score_prediction to generate scores for each comparison.
+        6. Calls compute_pairwise (if implemented) or compute_score to
+           generate scores for each comparison (only on and above the
+           diagonal, if the test is symmetric; the rest are mirrored).
         7. Checks that the score is of score_type, raising an
            InvalidScoreError.
         8. Equips the score with metadata:
@@ -463,6 +822,20 @@ class TestM2M(Test):
 
         If deep_error is true (not default), the traceback will contain the
         actual code execution error, instead of the content of an ErrorScore.
+
+        `executor` (default: `prediction_executor`) and `max_workers`
+        control whether predictions are generated in parallel (see
+        `generate_predictions`).
+
+        For many models, a `block_size` and/or `k_nearest` can be given
+        instead, to compute the scores in tiles without keeping any Score
+        objects.  Then, rather than a ScoreMatrixM2M, this returns either a
+        float matrix of norm scores, written to `out` (an array or the path
+        of a .npy file to memory-map; by default a temporary file), or, with
+        `k_nearest=k`, only each row's k highest norm scores (its k most
+        similar peers), as (n, k) arrays of column indices and norm scores.
+        Rows and columns are ordered as the observation (if any) followed by
+        the models.
         """
 
         # 1.
@@ -482,57 +855,194 @@ class TestM2M(Test):
             if not isinstance(model, Model):
                 raise TypeError(("TestM2M's judge method received a non-Model."
                                  "Invalid model name: '%s'" % model))
-            else:
-                try:
-                    # 3.
-                    self.check_capabilities(model,
-                                            skip_incapable=skip_incapable)
-                    # 4.
-                    prediction = self.generate_prediction(model)
-                    self.check_prediction(prediction)
-                    predictions.append(prediction)
-                except CapabilityError as e:
-                    raise CapabilityError(model, e.capability,
-                                          ("TestM2M's judge method resulted in"
-                                           " error for '%s'. Error: '%s'" %
-                                           (model, str(e))))
-                except Exception as e:
-                    raise Exception(("TestM2M's judge method resulted in error"
-                                     "for '%s'. Error: '%s'" %
-                                     (model, str(e))))
-
-        # 5. 2D list for scores; num(rows) = num(cols) = num(predictions)
-        scores = [[NoneScore for x in range(len(predictions))]
-                  for y in range(len(predictions))]
-
-        for i in range(len(predictions)):
-            for j in range(len(predictions)):
-                if not self.observation:
-                    model1 = models[i]
-                    model2 = models[j]
-                elif i == 0 and j == 0:
-                    model1 = None
-                    model2 = None
-                elif i == 0:
-                    model1 = models[j-1]
-                    model2 = None
-                elif j == 0:
-                    model1 = models[i-1]
-                    model2 = None
-                else:
-                    model1 = models[i-1]
-                    model2 = models[j-1]
-
-                scores[i][j] = self._judge(predictions[i], predictions[j],
-                                           model1, model2)
-                if isinstance(scores[i][j], ErrorScore) and stop_on_error:
-                    raise scores[i][j].score  # An exception.
+        # 3. and 4.
+        predictions += self.generate_predictions(
+                            models, skip_incapable=skip_incapable,
+                            executor=executor, max_workers=max_workers)
+
+        if block_size is not None or k_nearest is not None:
+            return self._judge_blocked(predictions, block_size=block_size,
+                                       out=out, k_nearest=k_nearest,
+                                       stop_on_error=stop_on_error)
+
+        # 5. Arrays for the raw score values and for any Score objects;
+        # num(rows) = num(cols) = num(predictions)
+        n = len(predictions)
+        raw = np.full((n, n), np.nan)
+        scores = np.empty((n, n), dtype=object)
+
+        # 6.
+        self._fill_scores(raw, scores, predictions, models, range(n),
+                          range(n), stop_on_error=stop_on_error)
 
         # 9.
         from sciunit.scores.collections_m2m import ScoreMatrixM2M
-        sm = ScoreMatrixM2M(self, models, scores=scores)
+        sm = ScoreMatrixM2M(self, models, scores=scores, raw_scores=raw,
+                            predictions=predictions)
         return sm
 
+    def _fill_scores(self, raw, scores, predictions, models, rows, cols,
+                     stop_on_error=True):
+        """Fill in the given rows and columns of the float array `raw` of
+        raw score values and of the object array `scores` of Score objects
+        (internal API use only).
+
+        Raw values from the pairwise kernel (if there is one, and the test
+        has no converter) are written straight to `raw`, and their Score
+        objects are left as None, to be made only when they are indexed
+        (see `ScoreMatrixM2M.score_at`).  If the test is symmetric, a score
+        below the diagonal is mirrored from above it, which must already
+        have been filled in.
+        """
+        rows = np.asarray(rows, dtype=int)
+        cols = np.asarray(cols, dtype=int)
+        pairwise = self.compute_pairwise([predictions[i] for i in rows],
+                                         [predictions[j] for j in cols])
+        values = None
+        if pairwise is not None and not self.converter:
+            values = np.asarray(pairwise)
+            if values.dtype.kind not in 'biuf':
+                values = None  # E.g. Score objects.
+        if values is not None:
+            block = np.ix_(rows, cols)
+            raw[block] = values
+            scores[block] = None
+            if self.symmetric:
+                # Mirror the scores from above the diagonal.
+                a, b = np.nonzero(cols[None, :] < rows[:, None])
+                below, above = (rows[a], cols[b]), (cols[b], rows[a])
+                raw[below] = raw[above]
+                mirrored = scores[above]
+                scores[below] = None
+                for k in np.flatnonzero([score is not None
+                                         for score in mirrored]):
+                    self._mirror_score(scores, predictions, models,
+                                       rows[a[k]], cols[b[k]])
+            return
+        from sciunit.scores.collections_m2m import score_value
+        for a, i in enumerate(rows):
+            for b, j in enumerate(cols):
+                if self.symmetric and j < i:
+                    raw[i, j] = raw[j, i]
+                    self._mirror_score(scores, predictions, models, i, j)
+                    continue
+                model1, model2 = self._pair_models(models, i, j)
+                score = self._judge(predictions[i], predictions[j],
+                                    model1, model2,
+                                    score=None if pairwise is None
+                                    else pairwise[a][b])
+                if isinstance(score, ErrorScore) and stop_on_error:
+                    raise score.score  # An exception.
+                scores[i, j] = score
+                raw[i, j] = score_value(score)
+
+    def _mirror_score(self, scores, predictions, models, i, j):
+        """Copy the score in row `j` and column `i` of `scores` (if it has
+        been made) to row `i` and column `j` (internal API use only)."""
+        score = scores[j, i]
+        if score is not None:
+            score = copy(score)
+            model1, model2 = self._pair_models(models, i, j)
+            self._bind_score(score, predictions[i], predictions[j],
+                             model1, model2)
+        scores[i, j] = score
+
+    def judge_added_models(self, sm, models, skip_incapable=False,
+                           stop_on_error=True, executor=None,
+                           max_workers=None):
+        """Add models to the score matrix `sm` from an earlier `judge`.
+
+        Generates predictions only for the new models, reusing those in
+        `sm`, and computes only the new rows and columns of scores.
+        Returns a new ScoreMatrixM2M.
+        """
+        if isinstance(models, Model):
+            models = [models]
+        models = list(models)
+        for model in models:
+            if not isinstance(model, Model):
+                raise TypeError(("TestM2M's judge method received a non-Model."
+                                 "Invalid model name: '%s'" % model))
+        if sm.predictions is None:
+            raise Error("The score matrix has no stored predictions.")
+        old = len(sm.predictions)
+        predictions = list(sm.predictions) + self.generate_predictions(
+                            models, skip_incapable=skip_incapable,
+                            executor=executor, max_workers=max_workers)
+        all_models = list(sm.models) + models
+        n = len(predictions)
+        raw = np.full((n, n), np.nan)
+        raw[:old, :old] = sm.raw_scores
+        scores = np.empty((n, n), dtype=object)
+        scores[:old, :old] = sm._scores
+        # First the new columns of the old rows (above the diagonal)...
+        self._fill_scores(raw, scores, predictions, all_models, range(old),
+                          range(old, n), stop_on_error=stop_on_error)
+        # ...then the new rows.
+        self._fill_scores(raw, scores, predictions, all_models,
+                          range(old, n), range(n),
+                          stop_on_error=stop_on_error)
+        from sciunit.scores.collections_m2m import ScoreMatrixM2M
+        return ScoreMatrixM2M(self, all_models, scores=scores,
+                              raw_scores=raw, predictions=predictions)
+
+    def generate_predictions(self, models, skip_incapable=False,
+                             executor=None, max_workers=None):
+        """Check the capabilities of each model and generate its prediction.
+
+        If `executor` (default: `prediction_executor`) is 'thread' or
+        'process', the predictions are generated in parallel on a new pool
+        of (at most `max_workers`) threads or processes; it can also be an
+        existing `concurrent.futures.Executor`.  For processes, the test and
+        the models must be picklable.  The predictions are returned in the
+        order of the models, and the first error (in that order) is raised;
+        when run serially, as soon as it occurs.
+        """
+        if executor is None:
+            executor = self.prediction_executor
+        if executor is None:
+            # Lazily, so that no more predictions are made after an error.
+            results = (_predict(self, model, skip_incapable)
+                       for model in models)
+        elif executor in ('thread', 'process'):
+            from concurrent.futures import ThreadPoolExecutor, \
+                                           ProcessPoolExecutor
+            pool_class = ThreadPoolExecutor if executor == 'thread' \
+                else ProcessPoolExecutor
+            with pool_class(max_workers=max_workers) as pool:
+                return self.generate_predictions(models, skip_incapable,
+                                                 executor=pool)
+        else:
+            futures = [executor.submit(_predict, self, model, skip_incapable)
+                       for model in models]
+            results = [future.result() for future in futures]
+        predictions = []
+        for model, (prediction, e) in zip(models, results):
+            if isinstance(e, CapabilityError):
+                raise CapabilityError(model, e.capability,
+                                      ("TestM2M's judge method resulted in"
+                                       " error for '%s'. Error: '%s'" %
+                                       (model, str(e))))
+            elif e is not None:
+                raise Exception(("TestM2M's judge method resulted in error"
+                                 "for '%s'. Error: '%s'" %
+                                 (model, str(e))))
+            predictions.append(prediction)
+        return predictions
+
+    def _pair_models(self, models, i, j):
+        """Return the models (if any) behind the predictions in row `i` and
+        column `j` of the score matrix."""
+        if not self.observation:
+            return models[i], models[j]
+        elif i == 0 and j == 0:
+            return None, None
+        elif i == 0:
+            return models[j-1], None
+        elif j == 0:
+            return models[i-1], None
+        return models[i-1], models[j-1]
+
     """
     # TODO: see if this needs to be updated and provided:
     def optimize(self, model):
@@ -541,6 +1051,22 @@ class TestM2M(Test):
     """
 
 
+def _predict(test, model, skip_incapable=False):
+    """Check the capabilities of `model` and generate its prediction for
+    `test`.
+
+    Returns the prediction and None, or None and the exception raised.
+    (A module-level function, so that it can be run in another process.)
+    """
+    try:
+        test.check_capabilities(model, skip_incapable=skip_incapable)
+        prediction = test.reduce_prediction(test.generate_prediction(model))
+        test.check_prediction(prediction)
+    except Exception as e:
+        return None, e
+    return prediction, None
+
+
 class RangeTest(Test):
     """Test if the model generates a number with a certain sign"""
 
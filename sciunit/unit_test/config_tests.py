@@ -20,4 +20,49 @@ class ConfigTestCase(unittest.TestCase):
         try:
             config_get('dummy')
         except sciunit.Error as e:
-            self.assertTrue('does not contain key' in str(e))
\ No newline at end of file
+            self.assertTrue('does not contain key' in str(e))
+
+    def test_config_reload(self):
+        import json
+        import shutil
+        import tempfile
+        from sciunit.errors import Error
+        from sciunit.utils import config, config_get, settings
+
+        cwd = settings['CWD']
+        directory = tempfile.mkdtemp()
+        config_path = os.path.join(directory, 'config.json')
+        with open(config_path, 'w') as f:
+            json.dump({'cmap_low': 1, 'cmap_high': 2}, f)
+        os.environ['SCIUNIT_CMAP_HIGH'] = '200'
+        settings['CWD'] = directory
+        try:
+            self.assertEqual(config_get('cmap_low'), 1)  # New CWD; reloaded.
+            self.assertEqual(config_get('cmap_high'), 200)  # Environment.
+            version = config.check()
+            self.assertEqual(config.check(), version)  # Not reloaded.
+            with open(config_path, 'w') as f:
+                json.dump({'cmap_low': 5}, f)
+            os.utime(config_path, (0, 0))  # A new modification time.
+            config.check_interval = 0
+            self.assertEqual(config_get('cmap_low'), 5)
+            self.assertTrue(config.check() > version)
+            os.environ['SCIUNIT_NOT_A_KEY'] = '1'  # Not in the file.
+            config.reload()
+            self.assertFalse('not_a_key' in config.values)
+            self.assertEqual(config_get(None, 3), 3)
+            self.assertRaises(TypeError, config_get, None)
+            with open(config_path, 'w') as f:
+                f.write('{"cmap_low": ')
+            config.reload()
+            with self.assertRaises(Error) as cm:
+                config_get('cmap_low')
+            self.assertTrue('not valid JSON' in str(cm.exception))
+        finally:
+            del config.check_interval
+            del os.environ['SCIUNIT_CMAP_HIGH']
+            os.environ.pop('SCIUNIT_NOT_A_KEY', None)
+            settings['CWD'] = cwd
+            config.reload()
+            shutil.rmtree(directory)
+        self.assertEqual(config_get('cmap_high'), 218)
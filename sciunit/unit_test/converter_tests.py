@@ -28,4 +28,37 @@ class ConvertersTestCase(unittest.TestCase):
         self.assertEqual(new_score,BooleanScore(True))
         new_score = RangeToBoolean(3,5).convert(old_score)
         self.assertEqual(new_score,BooleanScore(False))
-        self.assertEqual(new_score.raw,str(old_score.score))
\ No newline at end of file
+        self.assertEqual(new_score.raw,str(old_score.score))
+
+    def test_composed_and_many(self):
+        import numpy as np
+        from sciunit.converters import NoConversion,LambdaConversion,\
+                                       AtMostToBoolean,RangeToBoolean
+        from sciunit.scores import BooleanScore,ZScore,ScoreBlock,\
+                                   InsufficientDataScore
+
+        square = LambdaConversion(lambda x:x.score**2,
+                                  f_many=lambda values:values**2)
+        converter = square.then(RangeToBoolean(1,3))
+        self.assertEqual(converter.converted_type(ZScore),BooleanScore)
+        self.assertTrue('Then' in converter.description)
+        old_score = ZScore(1.3)
+        old_score.related_data['x'] = [1]
+        new_score = converter.convert(old_score)
+        self.assertEqual(new_score,BooleanScore(True))
+        self.assertTrue(new_score.related_data is old_score.related_data)
+        self.assertEqual(new_score.raw,str(old_score.score))
+
+        values = np.array([0.5,1.3,2.0])
+        self.assertEqual(list(converter.convert_many(values,ZScore)),
+                         [False,True,False])
+        # Without a vectorized lambda, scores are made one at a time.
+        slow = LambdaConversion(lambda x:x.score**2).then(AtMostToBoolean(1))
+        self.assertEqual(list(slow.convert_many(values,ZScore)),
+                         [True,False,False])
+        self.assertTrue(NoConversion().convert_many(values) is values)
+
+        block = converter.convert_many(ScoreBlock(ZScore,[1.3,np.nan]))
+        self.assertEqual(block.score_type,BooleanScore)
+        self.assertEqual(block[0].score,True)
+        self.assertTrue(isinstance(block[1],InsufficientDataScore))
@@ -87,3 +87,69 @@ class CapabilitiesTestCase(unittest.TestCase):
 
         m = RepeatedRandomNumberModel()
         self.assertEqual(m.produce_number(),m.produce_number())
+
+    def test_capability_index(self):
+        from sciunit import Model, TestSuite
+        from sciunit.capabilities import ProducesNumber, Runnable, \
+            CapabilityIndex
+        from sciunit.models.examples import ConstModel
+        from sciunit.scores import TBDScore, NAScore
+        from sciunit.tests import RangeTest
+
+        class FlakyModel(ConstModel):
+            extra_capability_checks = {ProducesNumber: 'can_produce'}
+
+            def can_produce(self):
+                self.n_checks = getattr(self, 'n_checks', 0) + 1
+                return self.constant > 0
+
+        models = [ConstModel(1), FlakyModel(-1), FlakyModel(2), Model()]
+        index = CapabilityIndex(models)
+        self.assertEqual(index.eligible(RangeTest([0, 3])),
+                         frozenset([0, 2]))
+        self.assertEqual(index.eligible([ProducesNumber, Runnable]),
+                         frozenset())
+        self.assertEqual(index.eligible(()), frozenset(range(4)))
+        self.assertEqual(index.missing(3, RangeTest([0, 3])), ProducesNumber)
+        index.eligible(RangeTest([5, 6]))
+        self.assertEqual(models[1].n_checks, 1)
+        self.assertEqual(CapabilityIndex(models, require_extra=True)
+                         .eligible([ProducesNumber]), frozenset([2]))
+
+        suite = TestSuite([RangeTest([0, 3]), RangeTest([5, 6])])
+        sm = suite.check(models)
+        self.assertTrue(isinstance(sm.iloc[0, 0], TBDScore))
+        self.assertTrue(isinstance(sm.iloc[1, 1], NAScore))
+        self.assertEqual(suite.check_capabilities(models[2]), [True, True])
+        self.assertEqual(suite.check_capabilities(models[1],
+                                                  skip_incapable=True),
+                         [False, False])
+
+        # Overridden checks are not bypassed by the index.
+        class PickyTest(RangeTest):
+            def check_capabilities(self, model, skip_incapable=False,
+                                   require_extra=False):
+                return model.constant > 1
+
+        class StrictNumber(ProducesNumber):
+            @classmethod
+            def check(cls, model, require_extra=False):
+                return False
+
+        class StrictTest(RangeTest):
+            required_capabilities = (StrictNumber,)
+
+        self.assertTrue(CapabilityIndex.covers(RangeTest([0, 3])))
+        self.assertFalse(CapabilityIndex.covers(PickyTest([0, 3])))
+        self.assertFalse(CapabilityIndex.covers(StrictTest([0, 3])))
+        patched = RangeTest([0, 3])
+        patched.check_capabilities = lambda *args, **kwargs: True
+        self.assertFalse(CapabilityIndex.covers(patched))
+        suite = TestSuite([PickyTest([0, 3]), StrictTest([0, 3])])
+        sm = suite.check(models[:3])
+        self.assertTrue(isinstance(sm.iloc[0, 0], NAScore))
+        self.assertTrue(isinstance(sm.iloc[2, 0], TBDScore))
+        self.assertTrue(isinstance(sm.iloc[2, 1], NAScore))
+        self.assertEqual(suite.check_capabilities(models[2],
+                                                  skip_incapable=True),
+                         [True, False])
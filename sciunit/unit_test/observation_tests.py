@@ -12,3 +12,50 @@ class ObservationsTestCase(unittest.TestCase, NotebookTools):
     def test_observation_validation(self):
         """Test validation of observations against the `observation_schema`."""
         self.do_notebook('validate_observation')
+
+    def test_native_validation_backend(self):
+        """Test that the native validator matches the cerberus validator."""
+        import quantities as pq
+        from sciunit import Test, settings
+        from sciunit.errors import ObservationError
+
+        class QuantityTest(Test):
+            observation_schema = [('Mean', {'mean': {'units': True,
+                                                     'required': True},
+                                            'std': {'units': True, 'min': 0,
+                                                    'required': True},
+                                            'n': {'type': 'integer',
+                                                  'min': 1}}),
+                                  ('Value', {'value': {'units': True,
+                                                       'iterable': True}})]
+            units = pq.V
+
+        observations = [{'mean': 3.1*pq.mV, 'std': 1.4*pq.mV},
+                        {'mean': 3.1*pq.mV, 'std': 1.4*pq.ms, 'n': 0},
+                        {'mean': 3.1*pq.mV, 'std': -1*pq.V, 'n': 1.5},
+                        {'value': 3.1*pq.mV},
+                        {'value': [1, 2]*pq.s},
+                        {'mean': 3.1*pq.mV, 'value': 2*pq.V}]
+
+        def errors(backend):
+            settings['VALIDATION_BACKEND'] = backend
+            result = []
+            for observation in observations:
+                try:
+                    QuantityTest(observation).validate_observation(observation)
+                except ObservationError as e:
+                    result.append(e.args[0])
+                else:
+                    result.append(None)
+            return result
+
+        backend = settings['VALIDATION_BACKEND']
+        try:
+            cerberus_errors = errors('cerberus')
+            native_errors = errors('native')
+        finally:
+            settings['VALIDATION_BACKEND'] = backend
+        self.assertEqual(cerberus_errors, native_errors)
+        self.assertEqual(native_errors[0], None)
+        self.assertEqual(native_errors[1]['observation'][0],
+                         'none or more than one rule validate')
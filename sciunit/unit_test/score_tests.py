@@ -8,6 +8,7 @@ import numpy as np
 from sciunit import TestSuite, ScoreMatrix, ScoreArray, ScorePanel
 from sciunit.scores import ZScore,CohenDScore,PercentScore,BooleanScore,FloatScore,RatioScore
 from sciunit.scores import ErrorScore,NAScore,TBDScore,NoneScore, InsufficientDataScore
+from sciunit.scores import Score
 from sciunit.tests import RangeTest
 
 from .base import SuiteBase
@@ -91,4 +92,293 @@ class ScoresTestCase(SuiteBase,unittest.TestCase):
         score = TBDScore(None)
         score = NoneScore(None)
         score = InsufficientDataScore(None)
-        self.assertEqual(score.norm_score,None)
\ No newline at end of file
+        self.assertEqual(score.norm_score,None)
+
+    def test_compute_many(self):
+        import quantities as pq
+        from sciunit.scores import ScoreBlock
+
+        observations = {'mean': np.array([1.0, 2.0, 3.0])*pq.mV,
+                        'std': np.array([1.0, 1.0, np.nan])*pq.mV}
+        block = ZScore.compute_many(observations, 2.0*pq.mV)
+        self.assertTrue(isinstance(block, ScoreBlock))
+        self.assertEqual(list(block[:2]), [1.0, 0.0])
+        self.assertTrue(isinstance(block[2], InsufficientDataScore))
+        predictions = np.array([1.0, 2.0, 4.0])*pq.mV
+        self.assertEqual(list(ZScore.compute_many(observations,
+                                                  predictions)[:2]),
+                         [ZScore.compute({'mean': 1.0*pq.mV,
+                                          'std': 1.0*pq.mV}, 1.0*pq.mV),
+                          0.0])
+
+        observations = np.rec.fromarrays([np.array([4.0, 2.0]),
+                                          np.array([1.0, 2.0])],
+                                         names=['mean', 'std'])
+        block = CohenDScore.compute_many(observations,
+                                         {'mean': 2.0, 'std': 1.0})
+        self.assertAlmostEqual(block[0].score, -2**0.5)
+        block = RatioScore.compute_many(observations, {'value': 2.0})
+        self.assertEqual(list(block.raw), [0.5, 1.0])
+        block = BooleanScore.compute_many(np.array([1, 2]), 2)
+        self.assertEqual([score.score for score in block], [False, True])
+        block = FloatScore.compute_ssd_many(np.ones((2, 3))*pq.mV,
+                                            np.zeros(3)*pq.mV)
+        self.assertEqual(block[1].score, 3.0*pq.mV**2)
+
+    def test_lean_scores(self):
+        from copy import copy
+        from sciunit.scores import ScoreBlock
+
+        score = ZScore(0.5)
+        self.assertEqual(list(score.__dict__), ['score'])
+        score.related_data['x'] = 1  # Made when first used.
+        self.assertEqual(score.related_data, {'x': 1})
+        other = ZScore(0.2)
+        other.unpicklable.append('x')  # Made for each score.
+        self.assertEqual(score.unpicklable, [])
+        other.x = 3
+        self.assertFalse('x' in other.__getstate__())
+        self.assertTrue(NAScore.interned() is NAScore.interned())
+        self.assertFalse(NAScore.interned() is TBDScore.interned())
+        self.assertTrue(isinstance(TBDScore.interned('Later'), TBDScore))
+        self.assertEqual(str(TBDScore.interned('Later').score), 'Later')
+        block = ScoreBlock(ZScore, np.zeros(3))
+        self.assertFalse(hasattr(block, '__dict__'))
+
+        t, t1, t2, m1, m2 = self.prep_models_and_tests()
+        sm = t.check([m1, m2])
+        self.assertTrue(sm.iloc[0, 0] is sm.iloc[1, 1])
+        shared = sm.iloc[0, 0]
+        with self.assertRaises(AttributeError):
+            shared.model = m1
+        with self.assertRaises(TypeError):
+            shared.related_data['x'] = 1
+        own = copy(shared)
+        own.model = m1
+        self.assertTrue(shared.model is None)
+        # Attributes not yet used are still emitted, with their defaults.
+        state = ZScore(0.5).json(string=False)
+        self.assertEqual(state['related_data'], {})
+        self.assertEqual(state['unpicklable'], [])
+
+    def test_norm_scores(self):
+        from sciunit.scores import ScoreBlock
+        from sciunit.scores.base import norm_score_array
+
+        for score_type, values in [(ZScore, [-2.0, 0.0, 0.5]),
+                                   (CohenDScore, [1.5, -0.1]),
+                                   (RatioScore, [0.5, 1.0, 20.0]),
+                                   (PercentScore, [0.0, 42.0]),
+                                   (FloatScore, [-3.0, 7.0]),
+                                   (BooleanScore, [True, False])]:
+            expected = [score_type(value).norm_score for value in values]
+            self.assertTrue(np.allclose(score_type.norm_scores(values),
+                                        expected))
+        block = ScoreBlock(ZScore, [0.0, np.nan])
+        self.assertEqual(block.norm_scores[0], 1.0)
+        self.assertTrue(np.isnan(block.norm_scores[1]))
+        norms = norm_score_array([[ZScore(0.0), ErrorScore(Exception())],
+                                  [NAScore(None), BooleanScore(True)]])
+        self.assertEqual(norms[0, 0], 1.0)
+        self.assertEqual(norms[0, 1], 0.0)
+        self.assertTrue(np.isnan(norms[1, 0]))
+        self.assertEqual(norms[1, 1], 1.0)
+
+        t, t1, t2, m1, m2 = self.prep_models_and_tests()
+        sm = t.judge([m1, m2])
+        self.assertEqual(sm.norm_scores.loc[m1, t1], 1.0)
+        self.assertEqual(sm.norm_scores.loc[m1, t2], 0.0)
+        sm.loc[m1, t2] = BooleanScore(True)  # Replacing a score resets it.
+        self.assertEqual(sm.norm_scores.loc[m1, t2], 1.0)
+
+    def test_value_colors(self):
+        import matplotlib.cm as cm
+        from sciunit.utils import config_get
+
+        cmap_low, cmap_high = config_get('cmap_low'), config_get('cmap_high')
+        values = np.array([[0.0, 0.25], [1.0, np.nan]])
+        colors = Score.value_colors(values)
+        self.assertEqual(colors.shape, (2, 2, 3))
+        for value, rgb in zip(values.ravel(), colors.reshape(-1, 3)):
+            if np.isnan(value):
+                expected = (128, 128, 128)
+            else:
+                index = int((cmap_high-cmap_low)*value+cmap_low)
+                expected = [x*256 for x in cm.RdYlGn(index)[:3]]
+            self.assertTrue(np.allclose(rgb, expected))
+        self.assertEqual(Score.value_color(None), (128, 128, 128))
+        self.assertEqual(Score.value_color(0.25), tuple(colors[0, 1]))
+        self.assertEqual(ZScore(0.0).color(), Score.value_color(1.0))
+
+    def test_rank_index(self):
+        t, t1, t2, m1, m2 = self.prep_models_and_tests()
+        sm = t.judge([m1, m2])
+        self.assertEqual(sm.stature(t1, m1), 1)
+        self.assertEqual(sm.stature('test1', m2), 2)
+        self.assertEqual(sm.percentile(t1, m1), 100.0)
+        self.assertEqual(sm.percentile(t1, m2), 50.0)
+        self.assertEqual(list(sm.leaderboard(t2).index), [m2, m1])
+        self.assertEqual(list(sm.leaderboard(t2, k=1).index), [m2])
+        self.assertEqual(list(sm.ranking().values), [0.5, 0.5])
+        self.assertEqual(sm.T.stature(t1, m2), 2)
+        index = sm.rank_index
+        self.assertTrue(sm.rank_index is index)  # Made once.
+        sm.loc[m2, t1] = BooleanScore(True)  # Invalidates it.
+        self.assertFalse(sm.rank_index is index)
+        self.assertEqual(sm.stature(t1, m2), 1.5)
+        self.assertEqual(list(sm.ranking().index), [m2, m1])
+        sm.at[m1, t2] = NAScore(None)
+        self.assertEqual(list(sm.leaderboard(t2).index), [m2])
+        sm.iloc[1, 1] = NAScore(None)
+        self.assertTrue(np.isnan(sm.percentile(t2, m2)))  # No norm scores.
+        sm[t2] = [BooleanScore(True), BooleanScore(False)]
+        self.assertEqual(sm.percentile(t2, m1), 100.0)
+
+    def test_distribution_scores(self):
+        import quantities as pq
+        from sciunit.scores import KSScore, WassersteinScore,\
+                                   EnergyDistanceScore, KLDivergenceScore
+
+        x = np.random.RandomState(0).normal(0, 1, 10000)
+        self.assertEqual(KSScore.compute(x, x).score, 0.0)
+        self.assertEqual(KSScore.compute([0.0, 1.0], [2.0, 3.0]).score, 1.0)
+        self.assertTrue(KSScore.compute(x, x+0.1).norm_score < 1.0)
+        # One sample-width apart, with the prediction in other units.
+        score = WassersteinScore.compute({'samples': x*pq.mV},
+                                         (x+1)/1000*pq.V)
+        self.assertTrue(isinstance(score, WassersteinScore))
+        self.assertAlmostEqual(float(score.score.rescale(pq.V)), 0.001)
+        score = EnergyDistanceScore.compute(np.array([0.0]), np.array([1.0]))
+        self.assertAlmostEqual(score.score, np.sqrt(2))  # sqrt(2E|X-Y|).
+        self.assertEqual(score.norm_score, 0.0)  # No spread in the samples.
+        # Norm scores relative to the spread of the samples, whatever their
+        # units, and lower for larger distances.
+        near = WassersteinScore.compute(x*pq.mV, (x+1)*pq.mV)
+        far = WassersteinScore.compute(x*pq.mV, (x+2)*pq.mV)
+        self.assertAlmostEqual(near.norm_score, 1/(1+1/float(near.scale)))
+        self.assertAlmostEqual(near.norm_score, 0.5, places=2)
+        self.assertTrue(far.norm_score < near.norm_score)
+        in_volts = WassersteinScore.compute(x/1000*pq.V, (x+1)/1000*pq.V)
+        self.assertAlmostEqual(in_volts.norm_score, near.norm_score)
+        energy = EnergyDistanceScore.compute(x*pq.mV, (x+1)*pq.mV)
+        in_volts = EnergyDistanceScore.compute(x/1000*pq.V, (x+1)/1000*pq.V)
+        self.assertAlmostEqual(in_volts.norm_score, energy.norm_score)
+        self.assertAlmostEqual(WassersteinScore(1.0).norm_score, 0.5)
+        self.assertEqual(KLDivergenceScore.compute(x, x).score, 0.0)
+        self.assertTrue(KLDivergenceScore.compute(x, x+1).score > 0.1)
+        self.assertTrue(isinstance(KSScore.compute([np.nan], x),
+                                   InsufficientDataScore))
+
+    def test_error_metric_scores(self):
+        import quantities as pq
+        from sciunit.errors import InvalidScoreError
+        from sciunit.scores import SSDScore, RMSEScore, MAEScore,\
+                                   MaxAbsErrorScore, NCCScore,\
+                                   ErrorMetricScore
+
+        rng = np.random.RandomState(0)
+        obs = rng.normal(0, 1, 1001)
+        pred = obs + rng.normal(0, 0.1, 1001)
+        error = pred - obs
+        chunk_size = ErrorMetricScore.chunk_size
+        ErrorMetricScore.chunk_size = 100  # Several chunks, and a short one.
+        try:
+            for score_type, expected in [
+                    (SSDScore, (error**2).sum()),
+                    (RMSEScore, np.sqrt((error**2).mean())),
+                    (MAEScore, np.abs(error).mean()),
+                    (MaxAbsErrorScore, np.abs(error).max()),
+                    (NCCScore, np.corrcoef(obs, pred)[0, 1])]:
+                score = score_type.compute(obs, {'values': pred})
+                self.assertAlmostEqual(score.score, expected)
+                # Units are converted, without changing the result.
+                score = score_type.compute(obs*pq.mV, pred/1000*pq.V)
+                value = getattr(score.score, 'magnitude', score.score)
+                self.assertAlmostEqual(float(value), expected)
+            # A NaN in any chunk (here, a later one) means no score.
+            nan_pred = pred.copy()
+            nan_pred[500] = np.nan
+            for score_type in (SSDScore, RMSEScore, MAEScore,
+                               MaxAbsErrorScore, NCCScore):
+                self.assertTrue(isinstance(score_type.compute(obs, nan_pred),
+                                           InsufficientDataScore))
+        finally:
+            ErrorMetricScore.chunk_size = chunk_size
+        self.assertEqual(SSDScore.compute(obs*pq.mV, pred*pq.mV).score.units,
+                         pq.mV**2)
+        self.assertEqual(NCCScore(0.0).norm_score, 0.5)
+        flat = NCCScore.compute(obs, np.ones_like(obs))
+        self.assertTrue(isinstance(flat, InsufficientDataScore))
+        self.assertTrue('zero variance' in flat.score)
+        with self.assertRaises(InvalidScoreError):
+            RMSEScore.compute(obs*pq.mV, pred*pq.s)
+        with self.assertRaises(InvalidScoreError):
+            RMSEScore.compute(obs, pred[:10])
+        self.assertEqual(FloatScore.compute_ssd(obs, pred).score,
+                         SSDScore.compute(obs, pred).score)
+
+    def test_unit_normalization(self):
+        import quantities as pq
+        from sciunit import utils
+
+        obs = {'mean': 10.0*pq.mV, 'std': 2.0*pq.mV, 'n': 5}
+        pred = {'mean': 0.013*pq.V, 'std': 3000.0*pq.uV, 'n': 7}
+        # Kernels on floats agree with the same arithmetic on quantities.
+        z = ((pred['mean'] - obs['mean'])/obs['std']).simplified
+        self.assertAlmostEqual(ZScore.compute(obs, pred).score, float(z))
+        self.assertAlmostEqual(CohenDScore.compute(obs, pred).score,
+                               3*(5+7-2)**0.5/(4*2**2 + 6*3**2)**0.5)
+        self.assertAlmostEqual(RatioScore.compute(obs, pred).score, 1.3)
+        self.assertEqual(type(ZScore.compute(obs, obs).score), float)
+        # Incompatible units still fail in unit algebra.
+        with self.assertRaises(ValueError):
+            ZScore.compute(obs, 13.0*pq.s)
+        self.assertEqual(utils.conversion_factor(pq.mV, pq.V), 0.001)
+        self.assertEqual(utils.assert_dimensionless(3.0*pq.mV/pq.V), 0.003)
+        with self.assertRaises(TypeError):
+            utils.assert_dimensionless(3.0*pq.mV)
+        canonical = utils.canonical(np.array([1.0, 2.0])*pq.ms)
+        self.assertEqual(canonical.units, pq.s)
+        self.assertTrue(np.allclose(canonical.magnitude, [0.001, 0.002]))
+        self.assertIsNone(utils.magnitudes(1.0*pq.mV, 2.0))
+
+    def test_parallel_kernels(self):
+        from sciunit.scores import SSDScore, MAEScore, MaxAbsErrorScore,\
+                                   NCCScore, ErrorMetricScore, KSScore,\
+                                   WassersteinScore, EnergyDistanceScore,\
+                                   KLDivergenceScore
+
+        rng = np.random.RandomState(0)
+        obs = rng.normal(0, 1, 10001)
+        pred = obs + rng.normal(0.1, 0.5, 10001)
+        score_types = [SSDScore, MAEScore, MaxAbsErrorScore, NCCScore,
+                       KSScore, WassersteinScore, EnergyDistanceScore,
+                       KLDivergenceScore]
+        chunk_size = ErrorMetricScore.chunk_size
+        ErrorMetricScore.chunk_size = 1000
+        try:
+            serial = [score_type.compute(obs, pred).score
+                      for score_type in score_types]
+            Score.parallel_threshold, Score.max_workers = 100, 3
+            # Split across threads only above the threshold.
+            segments = Score.map_segments(lambda a, b: [(a, b)], 10001, 1000)
+            self.assertEqual(segments, [(0, 4000), (4000, 8000),
+                                        (8000, 10001)])
+            self.assertEqual(Score.map_segments(lambda a, b: [(a, b)], 99),
+                             [(0, 99)])
+            # The threads are reused, and nested calls run serially.
+            from sciunit.scores.base import segment_pool
+            self.assertTrue(segment_pool(3) is segment_pool(3))
+            nested = Score.map_segments(
+                lambda a, b: Score.map_segments(lambda c, d: [(c, d)],
+                                                b - a), 10001, 1000)
+            self.assertEqual(nested, [(0, 4000), (0, 4000), (0, 2001)])
+            parallel = [score_type.compute(obs, pred).score
+                        for score_type in score_types]
+        finally:
+            ErrorMetricScore.chunk_size = chunk_size
+            Score.parallel_threshold, Score.max_workers = 2**22, None
+        for a, b in zip(serial[:4], parallel[:4]):
+            self.assertEqual(a, b)
+        for a, b in zip(serial[4:], parallel[4:]):
+            self.assertAlmostEqual(a, b)
@@ -47,6 +47,61 @@ class TestsTestCase(unittest.TestCase):
         self.assertTrue(score.test is range_2_3_test)
         self.assertTrue(score.model is one_model)
 
+    def test_observation_validation_memo(self):
+        import numpy as np
+        from sciunit import Test
+        from sciunit.errors import ObservationError
+        from sciunit.validators import get_validator, ObservationValidator
+
+        class MeanTest(Test):
+            observation_schema = {'mean': {'type': 'float'}}
+
+        t = MeanTest({'mean': 3.0})
+        t.validate_observation(t.observation)
+        self.assertEqual(len(t._validated_observations), 1)
+        t.validate_observation({'mean': 3.0})
+        self.assertEqual(len(t._validated_observations), 1)
+        self.assertRaises(ObservationError,
+                          t.validate_observation, {'mean': 'x'})
+
+        class SamplesTest(Test):
+            observation_schema = {'samples': {'iterable': True}}
+
+        big = {'samples': np.ones(10**5)}  # Keyed by identity, not hashed.
+        t3 = SamplesTest(big)
+        t3.validate_observation(big)
+        self.assertEqual(list(t3._validated_observations)[0][0], id(big))
+        t3.validate_observation(big)
+        self.assertEqual(len(t3._validated_observations), 1)
+        big['samples'] = np.zeros(10**5)
+        t3.validate_observation(big)
+        self.assertEqual(len(t3._validated_observations), 2)
+        schema = {'observation': {'schema': MeanTest.observation_schema,
+                                  'type': 'dict'}}
+        t2 = MeanTest({'mean': 4.0})
+        v1 = get_validator(ObservationValidator, schema, t)
+        v2 = get_validator(ObservationValidator, schema, t2)
+        self.assertTrue(v1 is not v2)  # Copies of one cached validator.
+        self.assertTrue(v1.schema is v2.schema)
+        self.assertTrue(v1.test is t)
+        self.assertTrue(v2.test is t2)
+
+    def test_normalize_units(self):
+        import quantities as pq
+        from sciunit import Test
+        from sciunit.scores import ZScore
+
+        class NormalizedTest(Test):
+            score_type = ZScore
+            normalize_units = True
+
+        t = NormalizedTest({'mean': 10.0*pq.mV, 'std': 2.0*pq.mV, 'n': 5})
+        self.assertEqual(t.observation['mean'].units, pq.V)
+        self.assertAlmostEqual(float(t.observation['std']), 0.002)
+        self.assertEqual(t.observation['n'], 5)
+        score = t.compute_score(t.observation, 13.0*pq.mV)
+        self.assertAlmostEqual(score.score, 1.5)
+
 
 class TestSuitesTestCase(SuiteBase,unittest.TestCase):
     """Unit tests for the sciunit module"""
@@ -78,6 +133,16 @@ class TestSuitesTestCase(SuiteBase,unittest.TestCase):
         ts.judge(m)
         self.assertEqual(t1.hook_called,True)
 
+        from sciunit.scores import NoneScore
+
+        def g(test, tests, score):
+            score.related_data['seen'] = True
+        ts = TestSuite([t1, t2], skip_models=[m], hooks={t1: {'f': g}})
+        sm = ts.judge(m)
+        self.assertEqual(sm[t1][m].related_data, {'seen': True})
+        self.assertEqual(sm[t2][m].related_data, {})
+        self.assertEqual(NoneScore.interned().related_data, {})
+
     def test_testsuite_from_observations(self):
         m = self.M(2,3)
         ts = TestSuite.from_observations([(self.T,[2,3]),
@@ -85,6 +150,292 @@ class TestSuitesTestCase(SuiteBase,unittest.TestCase):
                                         name="MySuite")
         ts.judge(m)
 
+    def test_testsuite_from_table(self):
+        import os
+        import shutil
+        import tempfile
+        import numpy as np
+        import quantities as pq
+        from sciunit import Test
+        from sciunit.errors import ObservationError
+        from sciunit.scores import ZScore
+
+        class MeanTest(Test):
+            observation_schema = {'mean': {'units': True, 'required': True},
+                                  'std': {'units': True, 'min': 0,
+                                          'required': True}}
+            units = pq.mV
+            score_type = ZScore
+
+        table = {'mean': np.arange(5.0), 'std': np.ones(5),
+                 'cell': ['cell%d' % i for i in range(5)]}
+        ts = TestSuite.from_table(table, MeanTest, name_column='cell',
+                                  units={'mean': pq.mV, 'std': pq.mV},
+                                  chunksize=2)
+        self.assertEqual(len(ts.tests), 5)
+        self.assertEqual(len(ts.tests._tests), 1)  # Only the prototype.
+        self.assertEqual(ts.tests[3].name, 'cell3')
+        self.assertEqual(ts.tests[3].observation['mean'], 3.0*pq.mV)
+        self.assertEqual(len(ts.tests._tests), 2)
+
+        ts = TestSuite.from_table(table, MeanTest, name_column='cell',
+                                  columns=('mean', 'std'),
+                                  units={'mean': pq.mV, 'std': pq.mV})
+        self.assertEqual(ts.tests[1].observation['std'], 1.0*pq.mV)
+
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'observations.csv')
+        with open(path, 'w') as f:
+            f.write('mean,std\n1.0,2.0\n2.0,\n')
+        with self.assertRaises(ObservationError) as cm:
+            TestSuite.from_table(path, MeanTest,
+                                 units={'mean': pq.mV, 'std': pq.mV})
+        self.assertEqual(list(cm.exception.args[0]), [1])
+
+        class TimeTest(MeanTest):
+            """Expects times for tests named 't...'."""
+            def __init__(self, observation, name=None, **params):
+                super(TimeTest, self).__init__(observation, name=name,
+                                               **params)
+                if name.startswith('t'):
+                    self.units = pq.s
+
+        # Each row is validated by its own test, since they may differ.
+        table['cell'] = ['v0', 't1', 'v2', 'v3', 'v4']
+        with self.assertRaises(ObservationError) as cm:
+            TestSuite.from_table(table, TimeTest, name_column='cell',
+                                 units={'mean': pq.mV, 'std': pq.mV})
+        self.assertEqual(list(cm.exception.args[0]), [1])
+
+    def test_testfamily(self):
+        import numpy as np
+        import quantities as pq
+        from sciunit import Test, TestFamily
+        from sciunit.capabilities import ProducesNumber
+        from sciunit.scores import ZScore, InsufficientDataScore
+        from sciunit.converters import LambdaConversion
+
+        class MeanTest(Test):
+            observation_schema = {'mean': {'units': True, 'required': True},
+                                  'std': {'units': True, 'min': 0}}
+            required_capabilities = (ProducesNumber,)
+            units = pq.mV
+            score_type = ZScore
+
+            def generate_prediction(self, model):
+                self.n_predictions = getattr(self, 'n_predictions', 0) + 1
+                return model.produce_number()*pq.mV
+
+        observations = {'mean': np.array([1.0, 2.0, 3.0]),
+                        'std': np.array([1.0, 1.0, np.nan])}
+        family = TestFamily(MeanTest, observations,
+                            units={'mean': pq.mV, 'std': pq.mV},
+                            names=['a', 'b', 'c'])
+        self.assertEqual(len(family), 3)
+        m = ConstModel(2.0)
+        scores = family.judge_model(m)
+        self.assertEqual([s.score for s in scores[:2]], [1.0, 0.0])
+        self.assertTrue(isinstance(scores[2], InsufficientDataScore))
+        self.assertEqual(family.prototype.n_predictions, 1)
+        self.assertTrue(scores[1].test is family.tests[1])
+        self.assertTrue(scores[1].model is m)
+        MeanTest.converter = LambdaConversion(lambda s: -s.score,
+                                              f_many=lambda values: -values)
+        scores = family.judge_model(m)  # Converted all at once.
+        self.assertEqual([s.score for s in scores[:2]], [-1.0, 0.0])
+        self.assertTrue(isinstance(scores[2], InsufficientDataScore))
+        MeanTest.converter = None
+
+        t = self.T([1, 3])
+        suite = TestSuite([family, t])
+        self.assertEqual(len(suite.tests), 4)
+        sm = suite.judge(m)
+        self.assertEqual(sm[family.tests[0]][m].score, 1.0)
+        self.assertEqual(sm[t][m].score, True)
+        suite = TestSuite(family)
+        self.assertEqual(suite.families, [family])
+        self.assertEqual(len(suite.tests), 3)
+        suite = TestSuite(iter([family, t]))
+        self.assertEqual(suite.families, [family])
+        self.assertEqual(len(suite.tests), 4)
+
+    def test_score_binding(self):
+        from sciunit.stores import PredictionStore, summarize
+        import numpy as np
+        import quantities as pq
+
+        t1 = self.T([1, 3])
+        t2 = self.T([5, 6])
+        m = ConstModel(2.0)
+        score = t1.judge(m)
+        self.assertEqual(score.prediction, 2.0)
+        self.assertTrue('prediction' in score.state)
+
+        store = PredictionStore()
+        suite = TestSuite([t1, t2], score_binding='summary',
+                          prediction_store=store)
+        sm = suite.judge(m)
+        score = sm[t1][m]
+        self.assertFalse('prediction' in score.__dict__)
+        self.assertEqual(score.prediction_summary,
+                         {'type': 'float', 'value': 2.0})
+        self.assertEqual(score.prediction, 2.0)
+        self.assertTrue(score.observation is t1.observation)
+        self.assertEqual(len(store), 1)  # The same prediction, stored once.
+        # The suite's settings only apply while it judges.
+        self.assertFalse('score_binding' in t1.__dict__)
+        self.assertTrue(t1.prediction_store is None)
+        self.assertTrue('prediction' in t1.judge(m).__dict__)
+        # Stored data live as long as the scores (or their copies) do.
+        import gc
+        from copy import copy
+        kept = copy(score)
+        del sm, score
+        gc.collect()
+        self.assertEqual(kept.prediction, 2.0)
+        del kept
+        gc.collect()
+        self.assertEqual(len(store), 0)
+        data = [1.0]
+        key = store.put(data)
+        self.assertEqual(store.put(data), key)
+        self.assertNotEqual(store.put([1.0]), key)
+
+        t1.score_binding = 'none'
+        score = t1.judge(m)
+        self.assertEqual(score.prediction, None)
+        self.assertEqual(score.prediction_summary, None)
+
+        summary = summarize({'v': np.ones((2, 3))*pq.mV})['items']['v']
+        self.assertEqual(summary['shape'], (2, 3))
+        self.assertEqual(summary['units'], 'mV')
+
+    def test_memory_budget(self):
+        import gc
+        import os
+        import numpy as np
+        import quantities as pq
+        from sciunit import Test
+        from sciunit.stores import SpillingPredictionStore
+
+        class TraceTest(Test):
+            required_capabilities = (ProducesNumber,)
+            score_type = FloatScore
+
+            def generate_prediction(self, model):
+                return np.ones(1000)*model.produce_number()*pq.mV
+
+            def compute_score(self, observation, prediction):
+                score = FloatScore(float(prediction.mean()))
+                score.related_data['trace'] = np.array(prediction)
+                return score
+
+        tests = [TraceTest({'mean': 0}, name='trace%d' % i) for i in range(3)]
+        models = [ConstModel(float(i)) for i in range(2)]
+        suite = TestSuite(tests, memory_budget=20000)
+        store = suite.prediction_store
+        self.assertTrue(isinstance(store, SpillingPredictionStore))
+        sm = suite.judge(models)
+        self.assertTrue(store.memory_used <= 20000)
+        self.assertTrue(len(os.listdir(store.spill_dir)) > 0)
+        score = sm[tests[0]][models[1]]  # The first to be spilled.
+        self.assertFalse('prediction' in score.__dict__)
+        self.assertTrue(isinstance(score.prediction.base, np.memmap))
+        self.assertEqual(score.prediction.units, pq.mV)
+        self.assertEqual(score.prediction[0], 1.0*pq.mV)
+        self.assertEqual(score.related_data['trace'][0], 1.0)
+        store.clear()
+        self.assertEqual(os.listdir(store.spill_dir), [])
+        with SpillingPredictionStore(0) as other:
+            other.put(np.ones(10))
+            self.assertEqual(len(os.listdir(other.spill_dir)), 1)
+        self.assertFalse(os.path.exists(other.spill_dir))
+        spill_dir = store.spill_dir
+        del store, suite, sm, score
+        gc.collect()
+        self.assertFalse(os.path.exists(spill_dir))
+
+    def test_bootstrap(self):
+        import numpy as np
+        from sciunit import Test, Error
+        from sciunit.scores import ZScore
+
+        class SampleTest(Test):
+            required_capabilities = (ProducesNumber,)
+            score_type = ZScore
+
+            def generate_prediction(self, model):
+                return model.produce_number()
+
+        class LoopTest(SampleTest):
+            def compute_score(self, observation, prediction):
+                return ZScore.compute(observation, prediction)
+
+        samples = np.random.RandomState(0).normal(1.0, 0.5, 200)
+        observation = {'mean': samples.mean(), 'std': samples.std(),
+                       'samples': samples}
+        t = SampleTest(observation)
+        m = ConstModel(1.2)
+        score = t.judge(m, bootstrap=2000, random_state=1)
+        low, high = score.ci
+        self.assertTrue(low < score.score < high)
+        self.assertEqual(score.ci_level, 0.95)
+        self.assertEqual(t.judge(m, bootstrap=2000, random_state=1).ci,
+                         score.ci)
+        self.assertEqual(t.judge(m).ci, None)
+        sm = t.judge([m, ConstModel(0.8)], bootstrap=2000, random_state=1)
+        self.assertEqual(sm[t][m].ci, score.ci)  # Passed on by the suite.
+        # Resampling the same way, with or without vectorization.
+        values = ZScore.bootstrap(observation, 1.2, 50, random_state=3)
+        self.assertEqual(values.shape, (50,))
+        self.assertTrue(np.allclose(
+            LoopTest(observation).compute_bootstrap(observation, 1.2, 50,
+                                                    random_state=3),
+            values))
+        with self.assertRaises(Error):
+            ZScore.bootstrap({'mean': 1.0, 'std': 1.0}, 1.2, 50)
+
+    def test_streaming(self):
+        import numpy as np
+        import quantities as pq
+        from sciunit import Test
+        from sciunit.scores import ZScore, CohenDScore
+        from sciunit.utils import RunningStats
+
+        data = np.random.RandomState(0).normal(3.0, 2.0, 10000)
+
+        class StreamTest(Test):
+            required_capabilities = (ProducesNumber,)
+            score_type = ZScore
+
+            def generate_prediction(self, model):
+                self.chunks = 0
+                for start in range(0, len(data), 1000):
+                    self.chunks += 1
+                    chunk = data[start:start+1000]*pq.mV
+                    yield chunk if start else chunk.rescale(pq.V)
+
+        observation = {'mean': 1.0*pq.mV, 'std': 2.0*pq.mV, 'n': 100}
+        t = StreamTest(observation)
+        score = t.judge(ConstModel(0.0))
+        self.assertEqual(t.chunks, 10)
+        self.assertAlmostEqual(score.score, (data.mean() - 1.0)/2.0)
+        self.assertEqual(score.prediction['n'], 10000)
+        self.assertEqual(score.prediction['mean'].units, pq.V)
+        StreamTest.score_type = CohenDScore
+        score = t.judge(ConstModel(0.0))
+        expected = CohenDScore.compute(observation,
+                                       {'mean': data.mean()*pq.mV,
+                                        'std': data.std()*pq.mV,
+                                        'n': len(data)})
+        self.assertAlmostEqual(score.score, expected.score)
+
+        stats = RunningStats().update_all([data[:3], [np.nan], data[3:]])
+        self.assertEqual(stats.n, len(data))
+        self.assertAlmostEqual(stats.mean, data.mean())
+        self.assertAlmostEqual(stats.std(ddof=1), data.std(ddof=1))
+
     def test_testsuite_set_verbose(self):
         t1 = self.T([2,3])
         t2 = self.T([5,6])
@@ -153,3 +504,196 @@ class M2MsTestCase(unittest.TestCase):
         self.assertEqual(myScore["Model2"][self.myModel1], 10.0)
         self.assertEqual(myScore[self.myModel1][self.myModel1], 0.0)
         self.assertEqual(myScore["Model2"]["Model2"], 0.0)
+
+    def test_testm2m_symmetric_pairwise(self):
+        import numpy as np
+
+        class DistanceTest_M2M(self.NumberTest_M2M):
+            symmetric = True
+
+            def compute_score(self, prediction1, prediction2):
+                self.n_computed = getattr(self, 'n_computed', 0) + 1
+                return FloatScore(abs(prediction1 - prediction2))
+
+        class PairwiseTest_M2M(DistanceTest_M2M):
+            def compute_pairwise(self, predictions1, predictions2=None):
+                if predictions2 is None:
+                    predictions2 = predictions1
+                p1 = np.asarray(predictions1, dtype=float)
+                p2 = np.asarray(predictions2, dtype=float)
+                return np.abs(p1[:, None] - p2[None, :])
+
+        models = [self.myModel1, self.myModel2, ConstModel(130.0, "Model3")]
+        myTest = DistanceTest_M2M(observation=95.0)
+        myScore = myTest.judge(models)
+        self.assertEqual(myTest.n_computed, 10)  # Of 16 scores.
+        self.assertEqual(myScore[self.myModel1][models[2]], 30.0)
+        self.assertEqual(myScore[models[2]][self.myModel1], 30.0)
+        score = myScore[models[2]][self.myModel1]
+        self.assertTrue(score.model1 is models[2])
+        self.assertTrue(score.model2 is self.myModel1)
+        self.assertEqual(myScore["observation"][self.myModel2], 15.0)
+
+        myTest = PairwiseTest_M2M(observation=95.0)
+        pairScore = myTest.judge(models)
+        self.assertFalse(hasattr(myTest, 'n_computed'))
+        # The kernel's values are kept as floats, without Score objects.
+        self.assertTrue((pairScore._scores == None).all())
+        self.assertTrue((pairScore.norm_scores.values ==
+                         myScore.norm_scores.values).all())
+        score = pairScore[models[2]][models[1]]
+        self.assertTrue(isinstance(score, FloatScore))
+        self.assertEqual(score, 20.0)
+        self.assertTrue(score.prediction1 is pairScore.predictions[3])
+        bigger = pairScore.add_models([ConstModel(100.0, "Model4")])
+        self.assertEqual(bigger.raw_scores[4, 2], 10.0)
+        self.assertTrue(bigger[models[2]][models[1]] is score)
+
+        # Writes reset the norm scores and the overwritten scores.
+        self.assertEqual(pairScore.norm_score_array[1, 2], 10.0)
+        pairScore.iloc[1, 2] = 5.0
+        self.assertEqual(pairScore.norm_score_array[1, 2], 5.0)
+        pairScore.loc[models[2], models[1]] = 7.0
+        self.assertEqual(pairScore.score_at(3, 2), 7.0)
+        pairScore.at[models[2], models[1]] = 8.0
+        self.assertEqual(pairScore.norm_scores.values[3, 2], 8.0)
+
+    def test_testm2m_parallel_predictions(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from sciunit import Model
+        from sciunit.errors import CapabilityError
+
+        models = [ConstModel(float(i), "Model%d" % i) for i in range(8)]
+        myTest = self.NumberTest_M2M(observation=None)
+        serial = myTest.judge(models)
+        threaded = myTest.judge(models, executor='thread', max_workers=4)
+        self.assertTrue((serial.norm_scores.values ==
+                         threaded.norm_scores.values).all())
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            myTest.prediction_executor = pool
+            self.assertEqual(myTest.judge(models)[models[7]][models[2]], 5.0)
+        with self.assertRaises(CapabilityError) as cm:
+            myTest.judge(models[:2] + [Model()], executor='thread')
+        self.assertTrue("TestM2M's judge method" in str(cm.exception))
+
+        class CountingModel(ConstModel):
+            def produce_number(self):
+                calls.append(self)
+                return super(CountingModel, self).produce_number()
+
+        calls = []
+        serial_models = [Model(), CountingModel(1.0), CountingModel(2.0)]
+        with self.assertRaises(CapabilityError):
+            self.NumberTest_M2M().generate_predictions(serial_models)
+        self.assertEqual(calls, [])  # Stopped at the first failing model.
+
+    def test_testm2m_blocked(self):
+        import gc
+        import os
+        import shutil
+        import tempfile
+        import numpy as np
+
+        class SimilarityTest_M2M(self.NumberTest_M2M):
+            symmetric = True
+
+            def compute_score(self, prediction1, prediction2):
+                return FloatScore(-abs(prediction1 - prediction2))
+
+        class PairwiseTest_M2M(SimilarityTest_M2M):
+            def compute_pairwise(self, predictions1, predictions2=None):
+                p1 = np.asarray(predictions1, dtype=float)
+                p2 = np.asarray(predictions2, dtype=float)
+                return -np.abs(p1[:, None] - p2[None, :])
+
+        models = [ConstModel(float(x), "Model%d" % i)
+                  for i, x in enumerate([0, 10, 1, 12, 5])]
+        myTest = SimilarityTest_M2M(observation=4.0)
+        full = myTest.judge(models).norm_scores.values.astype(float)
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'scores.npy')
+        blocked = PairwiseTest_M2M(observation=4.0).judge(models,
+                                                          block_size=2,
+                                                          out=path)
+        self.assertTrue(isinstance(blocked, np.memmap))
+        self.assertTrue((np.asarray(blocked) == full).all())
+        self.assertTrue((np.load(path, mmap_mode='r') == full).all())
+        # A temporary file is removed with the array.
+        blocked = myTest.judge(models, block_size=2)
+        self.assertTrue((np.asarray(blocked) == full).all())
+        path = blocked.filename
+        self.assertTrue(os.path.exists(path))
+        del blocked
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+        indices, values = myTest.judge(models, block_size=4, k_nearest=2)
+        self.assertEqual(indices.shape, (6, 2))
+        # Rows and columns are the observation followed by the models.
+        self.assertEqual(list(indices[1]), [3, 0])  # Model2, observation
+        self.assertEqual(list(values[1]), [-1.0, -4.0])
+        self.assertEqual(list(indices[0]), [5, 3])  # The observation.
+
+    def test_testm2m_add_models(self):
+        class CountingTest_M2M(self.NumberTest_M2M):
+            def generate_prediction(self, model, verbose=False):
+                self.n_predictions = getattr(self, 'n_predictions', 0) + 1
+                return model.produce_number()
+
+            def compute_score(self, prediction1, prediction2):
+                self.n_computed = getattr(self, 'n_computed', 0) + 1
+                return FloatScore(prediction1 - prediction2)
+
+        myModel3 = ConstModel(130.0, "Model3")
+        myTest = CountingTest_M2M(observation=95.0)
+        myScore = myTest.judge([self.myModel1, self.myModel2])
+        self.assertEqual((myTest.n_predictions, myTest.n_computed), (2, 9))
+        bigger = myScore.add_models([myModel3])
+        self.assertEqual((myTest.n_predictions, myTest.n_computed), (3, 16))
+        self.assertEqual(bigger.shape, (4, 4))
+        self.assertEqual(bigger[myModel3][self.myModel1], 30.0)
+        self.assertEqual(bigger[self.myModel2][myModel3], -20.0)
+        self.assertEqual(bigger["observation"][myModel3], -35.0)
+        full = myTest.judge([self.myModel1, self.myModel2, myModel3])
+        self.assertTrue((bigger.norm_scores.values ==
+                         full.norm_scores.values).all())
+
+    def test_score_matrix_m2m_arrays(self):
+        import warnings
+        import numpy as np
+        from sciunit import ScoreMatrixM2M
+
+        myTest = self.NumberTest_M2M(observation=95.0)
+        myScore = myTest.judge([self.myModel1, self.myModel2])
+        self.assertEqual(myScore.raw_scores.dtype, np.float64)
+        self.assertEqual(myScore.raw_scores[1, 2], -10.0)
+        self.assertEqual(myScore.norm_score_array[2, 0], 15.0)
+        score = myScore[self.myModel1][self.myModel2]
+        self.assertTrue(score.model1 is self.myModel1)
+
+        raw = myScore.raw_scores.copy()
+        raw[0, 0] = np.nan
+        lazy = ScoreMatrixM2M.from_arrays(myTest,
+                                          [self.myModel1, self.myModel2],
+                                          raw)
+        self.assertTrue((lazy._scores == None).all())
+        score = lazy[self.myModel2][self.myModel1]
+        self.assertTrue(isinstance(score, FloatScore))
+        self.assertEqual(score, 10.0)
+        self.assertTrue(score.model1 is self.myModel2)
+        self.assertEqual((lazy._scores != None).sum(), 3)  # One row.
+        self.assertEqual(lazy[(self.myModel1, self.myModel2)], -10.0)
+        self.assertTrue(np.isnan(lazy.norm_scores.values[0, 0]))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            myScore = myTest.judge([self.myModel1, self.myModel2])
+        self.assertEqual([str(w.message) for w in caught
+                          if 'new attribute name' in str(w.message)], [])
+        copied = myScore.copy()
+        self.assertTrue(copied.test is myTest)
+        self.assertTrue(copied[self.myModel1][self.myModel2] is
+                        myScore[self.myModel1][self.myModel2])
+        self.assertTrue((copied.norm_score_array ==
+                         myScore.norm_score_array).all())
@@ -58,3 +58,19 @@ class UtilsTestCase(unittest.TestCase):
         print("Commit hash is %s" % m.version)
         print("Remote URL is %s" % m.remote_url)
         self.assertTrue('sciunit' in m.remote_url)
+
+    def test_iter_table_chunks_npz(self):
+        import os
+        import numpy as np
+        from sciunit.utils import iter_table_chunks
+
+        fd, path = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        np.savez(path, mean=np.arange(5.0), std=np.ones(5))
+        chunks = list(iter_table_chunks(path, chunksize=2))
+        self.assertEqual([len(chunk['mean']) for chunk in chunks], [2, 2, 1])
+        # Object arrays would need unpickling, which is not allowed.
+        np.savez(path, name=np.array([{'a': 1}], dtype=object))
+        with self.assertRaises(ValueError):
+            list(iter_table_chunks(path))
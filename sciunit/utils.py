@@ -11,6 +11,7 @@ import pkgutil
 import importlib
 import json
 import re
+import time
 import contextlib
 from io import TextIOWrapper, StringIO
 from datetime import datetime
@@ -19,6 +20,8 @@ try:
 except ImportError:
     from backports.tempfile import TemporaryDirectory
 
+import numpy as np
+import pandas as pd
 import bs4
 import nbformat
 import nbconvert
@@ -43,6 +46,8 @@ mock = False  # mock is probably obviated by the unittest -b flag.
 settings = {'PRINT_DEBUG_STATE': False,  # printd does nothing by default.
             'LOGGING': True,
             'PREVALIDATE': False,
+            'VALIDATION_BACKEND': 'cerberus',  # Or 'native'.
+            'SCORE_BINDING': 'full',  # Or 'summary' or 'none'.
             'KERNEL': ('ipykernel' in sys.modules),
             'CWD': os.path.realpath(sciunit.__path__[0])}
 
@@ -89,22 +94,107 @@ else:  # Python 2
         sys.stdout = original
 
 
+_simplified_units_cache = {}
+_conversion_factors = {}
+
+
+def simplified_units(quantity):
+    """Return the simplified (SI) units of a quantity or unit.
+
+    Results are cached by dimensionality, so each kind of units is only
+    simplified once.
+    """
+    key = quantity.dimensionality.string
+    if key not in _simplified_units_cache:
+        _simplified_units_cache[key] = quantity.simplified.units
+    return _simplified_units_cache[key]
+
+
+def conversion_factor(units, target):
+    """Return the factor converting values in `units` to `target` units.
+
+    Factors are cached per pair of units, so that converting a value costs
+    one multiplication instead of a round of unit algebra.  Raises a
+    ValueError if the units are incompatible.
+    """
+    key = (units.dimensionality.string, target.dimensionality.string)
+    if key not in _conversion_factors:
+        factor = Quantity(1.0, units).rescale(target.units).magnitude
+        _conversion_factors[key] = float(factor)
+    return _conversion_factors[key]
+
+
+def canonical(value):
+    """Return quantity `value` in its simplified (SI) units, converted with
+    a cached factor.  Other values are returned as they are."""
+    if not isinstance(value, Quantity):
+        return value
+    units = simplified_units(value)
+    factor = conversion_factor(value.units, units)
+    if factor == 1.0:
+        return value
+    return Quantity(value.magnitude*factor, units, copy=False)
+
+
+def magnitudes(*values):
+    """Express `values` as plain floats (or arrays) in the units of the
+    first, for score kernels to compute with.
+
+    Quantities are converted with cached factors (see `conversion_factor`),
+    and arrays of size one become scalars.  Returns None if some but not all
+    of the values are quantities, or if their units are incompatible, so
+    that the caller can fall back to unit algebra (and its errors).
+    """
+    quantities = [isinstance(value, Quantity) for value in values]
+    if any(quantities):
+        if not all(quantities):
+            return None
+        units = values[0].units
+        try:
+            factors = [conversion_factor(value.units, units)
+                       for value in values]
+        except ValueError:
+            return None
+        values = [value.magnitude*factor if factor != 1.0
+                  else value.magnitude
+                  for value, factor in zip(values, factors)]
+    return [value.ravel()[0] if isinstance(value, np.ndarray) and
+            value.size == 1 else value for value in values]
+
+
 def assert_dimensionless(value):
     """
     Tests for dimensionlessness of input.
     If input is dimensionless but expressed as a Quantity, it returns the
-    bare value.  If it not, it raised an error.
+    bare value (or bare array).  If it not, it raised an error.
     """
 
     if isinstance(value, Quantity):
-        value = value.simplified
-        if value.dimensionality == Dimensionality({}):
-            value = value.base.item()
-        else:
+        if simplified_units(value).dimensionality != Dimensionality({}):
             raise TypeError("Score value %s must be dimensionless" % value)
+        factor = conversion_factor(value.units, simplified_units(value))
+        value = value.magnitude*factor
+        value = value.item() if value.size == 1 else value
+    elif isinstance(value, np.generic):
+        value = value.item()
     return value
 
 
+try:
+    from scipy.special import erf as _erf
+except ImportError:
+    import math
+    _erf = np.vectorize(math.erf, otypes=[float])
+
+
+def erf(x):
+    """The error function, applied elementwise to an array.
+
+    Uses scipy's ufunc if scipy is installed, and `math.erf` otherwise.
+    """
+    return _erf(np.asarray(x, dtype=float))
+
+
 class NotebookTools(object):
     """A class for manipulating and executing Jupyter notebooks."""
 
@@ -398,6 +488,109 @@ def dict_hash(d):
     return SciUnit.dict_hash(d)
 
 
+def iter_table_chunks(source, chunksize=10000, columns=None,
+                      file_format=None):
+    """Iterate over the rows of a table in chunks of at most `chunksize` rows.
+
+    `source` can be the path to a CSV, Parquet or NPZ file, a pandas
+    DataFrame, or a dictionary of equal-length arrays. Each chunk is a
+    dictionary mapping column names to arrays. Reading Parquet files
+    requires pyarrow.  NPZ files are loaded without unpickling, so they
+    cannot hold object arrays.
+    """
+    if isinstance(source, pd.DataFrame):
+        source = {key: source[key].values for key in source.columns}
+    if isinstance(source, dict):
+        keys = list(source) if columns is None else list(columns)
+        n_rows = len(source[keys[0]]) if keys else 0
+        for start in range(0, n_rows, chunksize):
+            yield {key: np.asarray(source[key][start:start+chunksize])
+                   for key in keys}
+        return
+    if file_format is None:
+        file_format = os.path.splitext(source)[1].lstrip('.')
+    file_format = file_format.lower()
+    if file_format == 'csv':
+        for df in pd.read_csv(source, chunksize=chunksize, usecols=columns):
+            yield {key: df[key].values for key in df.columns}
+    elif file_format in ('parquet', 'pq'):
+        try:
+            import pyarrow.parquet as parquet
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pyarrow")
+        parquet_file = parquet.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize,
+                                               columns=columns):
+            yield {key: batch.column(i).to_numpy(zero_copy_only=False)
+                   for i, key in enumerate(batch.schema.names)}
+    elif file_format == 'npz':
+        with np.load(source, allow_pickle=False) as f:
+            arrays = {key: f[key] for key in (columns or f.files)}
+        for chunk in iter_table_chunks(arrays, chunksize=chunksize):
+            yield chunk
+    else:
+        raise Error("Unknown table format '%s'" % file_format)
+
+
+class RunningStats(object):
+    """The count, mean and variance of a stream of values, accumulated one
+    chunk (array) at a time, so that the values are never all in memory.
+
+    Each chunk is reduced with numpy and merged into the running totals
+    (Welford's algorithm, in the pairwise form of Chan et al.).  NaNs are
+    ignored.  Quantity chunks are rescaled to the units of the first.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # The sum of squared deviations from the mean.
+        self.units = None
+
+    def update(self, chunk):
+        """Add a chunk of values (an array, or a single value)."""
+        if isinstance(chunk, Quantity):
+            if self.units is None and self.n == 0:
+                self.units = chunk.units
+            chunk = chunk.rescale(self.units).magnitude
+        elif self.units is not None:
+            raise Error("A chunk without units followed chunks with units")
+        chunk = np.ravel(np.asarray(chunk, dtype=float))
+        chunk = chunk[~np.isnan(chunk)]
+        n = len(chunk)
+        if not n:
+            return self
+        mean = chunk.mean()
+        m2 = ((chunk - mean)**2).sum()
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta*n/total
+        self.m2 += m2 + delta**2*self.n*n/total
+        self.n = total
+        return self
+
+    def update_all(self, chunks):
+        """Add each of an iterable of chunks (e.g. from a generator)."""
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def var(self, ddof=0):
+        return self.m2/(self.n - ddof) if self.n > ddof else np.nan
+
+    def std(self, ddof=0):
+        return np.sqrt(self.var(ddof=ddof))
+
+    def summary(self, ddof=0):
+        """A dictionary of the 'mean', 'std' and 'n' of the values (with the
+        mean and standard deviation in their units, if they had any)."""
+        mean = self.mean if self.n else np.nan
+        std = self.std(ddof=ddof)
+        if self.units is not None:
+            mean, std = mean*self.units, std*self.units
+        return {'mean': mean, 'std': std, 'n': self.n}
+
+
 def method_cache(by='value',method='run'):
     """A decorator used on any model method which calls the model's 'method'
     method if that latter method has not been called using the current
@@ -487,16 +680,104 @@ def config_get_from_path(config_path,key):
     return value
 
 
-def config_get(key, default=None):
-    try:
-        assert isinstance(key,str), "Config key must be a string"
-        config_path = os.path.join(settings['CWD'],'config.json')
-        value = config_get_from_path(config_path,key)
-    except Exception as e:
-        if default is not None:
+class Config(object):
+    """The sciunit configuration, i.e. the contents of `config.json` in the
+    `settings['CWD']` directory, whose values can be overridden by
+    environment variables named SCIUNIT_<KEY> (e.g. SCIUNIT_CMAP_LOW; parsed
+    as JSON where possible).  Only keys in the file can be overridden.
+
+    The configuration is loaded once and kept in memory, so that looking up
+    a key is a dictionary lookup.  It is loaded again if the file's
+    modification time changes (which is checked at most once every
+    `check_interval` seconds), if `settings['CWD']` changes, or when
+    `reload` is called (e.g. after changing the environment variables).
+    """
+
+    env_prefix = 'SCIUNIT_'
+    check_interval = 1.0  # Seconds between checks of the file's mtime.
+
+    def __init__(self):
+        self.values = {}
+        self.error = None
+        self.version = 0
+        self._stamp = None
+        self._checked = None
+        self._defaults_logged = set()
+
+    @property
+    def path(self):
+        return os.path.join(settings['CWD'], 'config.json')
+
+    def stamp(self):
+        """The path to the config file and its modification time."""
+        path = self.path
+        try:
+            return path, os.path.getmtime(path)
+        except OSError:
+            return path, None
+
+    def reload(self):
+        """Load the config file and environment variable overrides."""
+        self._stamp = self.stamp()
+        self._checked = time.time()
+        values, self.error = {}, None
+        try:
+            with open(self._stamp[0]) as f:
+                values = json.load(f)
+        except (IOError, OSError):
+            self.error = Error("Config file not found at '%s'" %
+                               self._stamp[0])
+        except ValueError as e:
+            self.error = Error("Config file at '%s' is not valid JSON: %s" %
+                               (self._stamp[0], e))
+        for name, value in os.environ.items():
+            key = name[len(self.env_prefix):].lower()
+            if name.startswith(self.env_prefix) and key in values:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+                values[key] = value
+        self.values = values
+        self.version += 1
+        self._defaults_logged = set()
+
+    def check(self):
+        """Reload the configuration if it is stale.  Returns its version,
+        which increments with each (re)load."""
+        now = time.time()
+        if self._stamp is None or self._stamp[0] != self.path:
+            self.reload()
+        elif now - self._checked >= self.check_interval:
+            self._checked = now
+            if self.stamp() != self._stamp:
+                self.reload()
+        return self.version
+
+    def get(self, key, default=None):
+        """Return the value of `key`, or `default` if it has none (raising
+        an Error instead if `default` is None)."""
+        if not isinstance(key, str):
+            if default is not None:
+                return default
+            raise TypeError("Config key must be a string, not %r" % (key,))
+        self.check()
+        if key in self.values:
+            return self.values[key]
+        e = self.error or Error("Config file does not contain key '%s'" % key)
+        if default is None:
+            raise e
+        if key not in self._defaults_logged:  # Once per key per load.
+            self._defaults_logged.add(key)
             log(e)
             log("Using default value of %s" % default)
-            value = default
-        else:
-            raise e
-    return value
+        return default
+
+
+config = Config()
+
+
+def config_get(key, default=None):
+    """Return the value of `key` in the sciunit configuration (see
+    `Config`), or `default` if it has none."""
+    return config.get(key, default)
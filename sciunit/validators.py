@@ -1,10 +1,22 @@
-"""Cerberus validator classes for SciUnit."""
+"""Cerberus (and native) validator classes for SciUnit."""
 
+import copy
 import inspect
+try:
+    from functools import lru_cache
+except ImportError:  # Python 2
+    from backports.functools_lru_cache import lru_cache
+try:
+    from collections.abc import Mapping
+except ImportError:  # Python 2
+    from collections import Mapping
 
 import quantities as pq
 from cerberus import TypeDefinition, Validator
 
+from sciunit.utils import settings, simplified_units
+from sciunit.errors import UnsupportedSchemaError
+
 
 def register_type(cls, name):
     """Register `name` as a type to validate as an instance of class `cls`."""
@@ -18,6 +30,74 @@ def register_quantity(quantity, name):
     Validator.types_mapping[name] = x
 
 
+register_type(pq.quantity.Quantity, 'quantity')
+
+
+_units_match_cache = {}
+
+
+def units_match(value, required_units):
+    """Return whether quantity `value` has units equivalent to
+    `required_units` once both are simplified."""
+    key = (value.dimensionality.string, required_units.dimensionality.string)
+    if key not in _units_match_cache:
+        if not isinstance(required_units, pq.Dimensionless):
+            required_units = simplified_units(required_units)
+        match = simplified_units(value) == required_units
+        _units_match_cache[key] = bool(match)
+    return _units_match_cache[key]
+
+
+class _SchemaKey(object):
+    """A schema, hashable by its repr so that it can key a cache."""
+
+    __slots__ = ('schema', 'key')
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.key = repr(schema)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+@lru_cache(maxsize=256)
+def _cached_validator(validator_cls, test_cls, schema_key, backend):
+    """Build the validator shared by all tests of class `test_cls` that
+    validate `schema_key.schema` (see `get_validator`)."""
+    schema = schema_key.schema
+    if backend == 'native':
+        try:
+            return NativeValidator(schema, validator_cls=validator_cls)
+        except UnsupportedSchemaError:
+            pass
+    return validator_cls(schema, test=None)
+
+
+def get_validator(validator_cls, schema, test):
+    """Get a validator of class `validator_cls` for `schema`, bound to `test`.
+
+    Building a cerberus validator compiles (and checks) its schema, so
+    validators are cached per (validator class, test class, schema), in a
+    bounded cache.  Each call gets a shallow copy of the cached validator,
+    bound to `test`, so that calls (e.g. from several threads) do not share
+    the state of a validation.
+
+    If settings['VALIDATION_BACKEND'] is 'native', a `NativeValidator` is
+    used instead whenever it supports all of the rules in `schema`.
+    """
+    validator = copy.copy(_cached_validator(validator_cls, test.__class__,
+                                            _SchemaKey(schema),
+                                            settings['VALIDATION_BACKEND']))
+    if isinstance(validator, Validator):
+        validator._config = dict(validator._config)
+    validator.test = test
+    return validator
+
+
 class ObservationValidator(Validator):
     """Cerberus validator class for observations."""
 
@@ -26,14 +106,23 @@ class ObservationValidator(Validator):
 
         Cannot be a positional argument without modifications to cerberus
         """
-        try:
-            self.test = kwargs['test']
-        except AttributeError:
+        if 'test' not in kwargs:
             raise Exception(("Observation validator constructor must have "
                              "a `test` keyword argument"))
         super(ObservationValidator, self).__init__(*args, **kwargs)
-        register_type(pq.quantity.Quantity, 'quantity')
-        
+
+    @property
+    def test(self):
+        """The test whose observation is being validated.
+
+        Kept in the cerberus config so that child validators inherit it.
+        """
+        return self._config.get('test')
+
+    @test.setter
+    def test(self, value):
+        self._config['test'] = value
+
     def _validate_iterable(self, is_iterable, key, value):
         """Validate fields with `iterable` key in schema set to True"""
         if is_iterable:
@@ -55,48 +144,288 @@ class ObservationValidator(Validator):
                 required_units = self.test.units
             if not isinstance(value, pq.quantity.Quantity):
                 self._error(key, "Must be a python quantity")
-            if not isinstance(value, pq.quantity.Quantity):
-                self._error(key, "Must be a python quantity")
-            provided_units = value.simplified.units
-            if not isinstance(required_units, pq.Dimensionless):
-                required_units = required_units.simplified.units
-            if not required_units == provided_units:
+            elif not units_match(value, required_units):
                 self._error(key,
-                            "Must have units of '%s'" % self.test.units.name)
+                            "Must have units of '%s'" % required_units.name)
 
 
 class ParametersValidator(Validator):
     """Cerberus validator class for observations."""
 
+    @property
+    def test(self):
+        """The test whose params are being validated."""
+        return self._config.get('test')
+
+    @test.setter
+    def test(self, value):
+        self._config['test'] = value
+
     units_map = {'time': 's', 'voltage': 'V', 'current': 'A'}
 
     def validate_quantity(self, value):
         """Validate that the value is of the `Quantity` type."""
         if not isinstance(value, pq.quantity.Quantity):
             self._error('%s' % value, "Must be a Python quantity.")
+            return False
+        return True
 
-    def validate_units(self, value):
-        """Validate units, assuming that it was called by _validate_type_*."""
-        self.validate_quantity(value)
-        self.units_type = inspect.stack()[1][3].split('_')[-1]
-        assert self.units_type, ("`validate_units` should not be called "
-                                 "directly. It should be called by a "
-                                 "_validate_type_* methods that sets "
-                                 "`units_type`")
-        units = getattr(pq, self.units_map[self.units_type])
-        if not value.simplified.units == units:
-            self._error('%s' % value,
-                        "Must have dimensions of %s." % self.units_type)
+    def validate_units(self, value, units_type=None):
+        """Validate that `value` has the dimensions of `units_type`.
+
+        If `units_type` is not given it is taken from the name of the calling
+        _validate_type_* method.
+        """
+        if units_type is None:
+            units_type = inspect.stack()[1][3].split('_')[-1]
+        assert units_type in self.units_map, \
+            "Unknown units type '%s'" % units_type
+        self.units_type = units_type
+        if self.validate_quantity(value):
+            units = getattr(pq, self.units_map[units_type])
+            if not units_match(value, units):
+                self._error('%s' % value,
+                            "Must have dimensions of %s." % units_type)
         return True
 
     def _validate_type_time(self, value):
         """Validate fields requiring `units` of seconds."""
-        return self.validate_units(value)
+        return self.validate_units(value, 'time')
 
     def _validate_type_voltage(self, value):
         """Validate fields requiring `units` of volts."""
-        return self.validate_units(value)
+        return self.validate_units(value, 'voltage')
 
     def _validate_type_current(self, value):
         """Validate fields requiring `units` of amps."""
-        return self.validate_units(value)
+        return self.validate_units(value, 'current')
+
+
+class NativeValidator(object):
+    """A pure Python validator for the schema rules SciUnit uses most.
+
+    Supports the 'type', 'required', 'nullable', 'iterable', 'units', 'min',
+    'max', 'schema' and 'oneof_schema' rules. The schema is compiled once into
+    closures (with units simplified once and cached), so validating a
+    document is just a few function calls. It mirrors the types, rules and
+    error messages of the cerberus `validator_cls` it stands in for.
+
+    Raises an UnsupportedSchemaError if the schema uses any other rule, in
+    which case the cerberus validator should be used instead.
+    """
+
+    rules = ('type', 'required', 'nullable', 'iterable', 'units', 'min',
+             'max', 'schema', 'oneof_schema')
+
+    # Rules that cerberus skips for a value of None.
+    nullable_skipped = ('type', 'min', 'max', 'schema')
+
+    def __init__(self, schema, test=None, validator_cls=ObservationValidator):
+        self.test = test
+        self.validator_cls = validator_cls
+        self.errors = {}
+        self._check = self._compile_mapping(schema)
+
+    def validate(self, document):
+        """Validate `document`, storing any errors in `self.errors`."""
+        self.errors = self._check(document, self.test)
+        return not self.errors
+
+    @classmethod
+    def _add_error(cls, errors, key, message, rule=None):
+        """Record an error for `key`.
+
+        Like cerberus, errors from custom rules (`rule` of None) are listed
+        before those from standard rules, which are sorted by rule name.
+        """
+        order = (0, '') if rule is None else (1, rule)
+        errors.setdefault(key, []).append((order, message))
+
+    @classmethod
+    def _sorted_errors(cls, errors):
+        return dict((key, [message for order, message in
+                           sorted(errors[key], key=lambda x: x[0])])
+                    for key in sorted(errors))
+
+    def _compile_mapping(self, schema):
+        """Compile a {field: rules} schema into a function that returns
+        the errors for a document."""
+        if not isinstance(schema, Mapping):
+            raise UnsupportedSchemaError("Schema must be a mapping")
+        checks = [(field, self._compile_field(rules))
+                  for field, rules in schema.items()]
+        required = [field for field, rules in schema.items()
+                    if rules.get('required')]
+
+        def check(document, test):
+            errors = {}
+            for field in document:
+                if field not in schema:
+                    self._add_error(errors, field, 'unknown field',
+                                    'unknown')
+            for field in required:
+                if field not in document:
+                    self._add_error(errors, field, 'required field',
+                                    'required')
+            for field, check_field in checks:
+                if field in document:
+                    check_field(field, document[field], errors, test)
+            return self._sorted_errors(errors)
+        return check
+
+    def _compile_field(self, rules):
+        """Compile the rules for one field into a function that adds any
+        errors for its value."""
+        if not isinstance(rules, Mapping):
+            raise UnsupportedSchemaError("Field rules must be a mapping")
+        unsupported = set(rules).difference(self.rules)
+        if unsupported:
+            raise UnsupportedSchemaError("Unsupported rules: %s" %
+                                         sorted(unsupported))
+        if ('schema' in rules or 'oneof_schema' in rules) and \
+           rules.get('type') != 'dict':
+            raise UnsupportedSchemaError("Sub-schemas require type 'dict'")
+        nullable = rules.get('nullable', False)
+        checks = []
+        if 'type' in rules:
+            checks.append(('type', self._compile_type(rules['type'])))
+        for rule, constraint in rules.items():
+            if rule not in ('type', 'required', 'nullable'):
+                compile_rule = getattr(self, '_compile_%s' % rule)
+                checks.append((rule, compile_rule(constraint)))
+
+        def check(field, value, errors, test):
+            if value is None:
+                if not nullable:
+                    self._add_error(errors, field, 'null value not allowed',
+                                    'nullable')
+                rule_checks = [(rule, f) for rule, f in checks
+                               if rule not in self.nullable_skipped]
+            else:
+                rule_checks = checks
+            for rule, check_rule in rule_checks:
+                if check_rule(field, value, errors, test) is False:
+                    break  # e.g. a failed type check skips remaining rules.
+        return check
+
+    def _compile_type(self, types):
+        names = [types] if isinstance(types, str) else types
+        units_map = getattr(self.validator_cls, 'units_map', {})
+        matchers = []
+        for name in names:
+            if name in units_map:
+                matchers.append(self._compile_units_type(name))
+            elif name in self.validator_cls.types_mapping:
+                type_def = self.validator_cls.types_mapping[name]
+                matchers.append(self._compile_type_definition(type_def))
+            else:
+                raise UnsupportedSchemaError("Unsupported type '%s'" % name)
+        message = "must be of %s type" % (types,)
+
+        def check(field, value, errors, test):
+            for matches in matchers:
+                if matches(value, errors):
+                    return True
+            self._add_error(errors, field, message, 'type')
+            return False
+        return check
+
+    def _compile_type_definition(self, type_def):
+        included = type_def.included_types
+        excluded = type_def.excluded_types
+
+        def matches(value, errors):
+            return isinstance(value, included) and \
+                not isinstance(value, excluded)
+        return matches
+
+    def _compile_units_type(self, units_type):
+        """Compile a type such as 'time', which (like ParametersValidator)
+        records unit errors under the value itself and always matches."""
+        units = getattr(pq, self.validator_cls.units_map[units_type])
+        message = "Must have dimensions of %s." % units_type
+
+        def matches(value, errors):
+            if not isinstance(value, pq.quantity.Quantity):
+                self._add_error(errors, '%s' % value,
+                                "Must be a Python quantity.")
+            elif not units_match(value, units):
+                self._add_error(errors, '%s' % value, message)
+            return True
+        return matches
+
+    def _compile_iterable(self, is_iterable):
+        def check(field, value, errors, test):
+            if is_iterable:
+                try:
+                    iter(value)
+                except TypeError:
+                    self._add_error(errors, field,
+                                    "Must be iterable (e.g. a list or array)")
+        return check
+
+    def _compile_units(self, has_units):
+        def check(field, value, errors, test):
+            if not has_units:
+                return
+            if isinstance(test.units, dict):
+                required_units = test.units[field]
+            else:
+                required_units = test.units
+            if not isinstance(value, pq.quantity.Quantity):
+                self._add_error(errors, field, "Must be a python quantity")
+            elif not units_match(value, required_units):
+                self._add_error(errors, field, "Must have units of '%s'"
+                                % required_units.name)
+        return check
+
+    def _compile_min(self, min_value):
+        message = 'min value is %s' % (min_value,)
+
+        def check(field, value, errors, test):
+            try:
+                if value < min_value:
+                    self._add_error(errors, field, message, 'min')
+            except TypeError:
+                pass
+        return check
+
+    def _compile_max(self, max_value):
+        message = 'max value is %s' % (max_value,)
+
+        def check(field, value, errors, test):
+            try:
+                if value > max_value:
+                    self._add_error(errors, field, message, 'max')
+            except TypeError:
+                pass
+        return check
+
+    def _compile_schema(self, schema):
+        check_mapping = self._compile_mapping(schema)
+
+        def check(field, value, errors, test):
+            child_errors = check_mapping(value, test)
+            if child_errors:
+                self._add_error(errors, field, child_errors, 'schema')
+        return check
+
+    def _compile_oneof_schema(self, schemas):
+        check_mappings = [self._compile_mapping(schema) for schema in schemas]
+
+        def check(field, value, errors, test):
+            failures = {}
+            n_valid = 0
+            for i, check_mapping in enumerate(check_mappings):
+                child_errors = check_mapping(value, test)
+                if child_errors:
+                    failures['oneof definition %d' % i] = [child_errors]
+                else:
+                    n_valid += 1
+            if n_valid != 1:
+                self._add_error(errors, field,
+                                'none or more than one rule validate',
+                                'oneof')
+                if failures:
+                    self._add_error(errors, field, failures, 'oneof')
+        return check